@@ -0,0 +1,74 @@
+"""
+Асинхронное чтение произведений, отзывов и комментариев под ASGI.
+
+Django 3.2 под ASGI выполняет синхронные представления в режиме
+`thread_sensitive`: все запросы делят один поток и обрабатываются по
+очереди. Асинхронного ORM в Django 3.2 нет, поэтому асинхронные
+представления передают чтение — JWT-аутентификацию, запросы к базе и
+сериализацию тем же DRF-представлением — в пул потоков без привязки, и
+запросы на чтение выполняются параллельно. Остальные методы выполняются
+в общем потоке, как синхронные представления.
+
+Маршруты заменяются при `ASYNC_READS` (включается в `asgi.py`).
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+
+from django.db import close_old_connections
+from django.urls import URLPattern
+
+from .budget import QueryCounter, counting_queries
+from .views import CommentViewSet, ReviewViewSet, TitleViewSet
+
+ASYNC_READ_ACTIONS = {
+    TitleViewSet: ('list', 'retrieve'),
+    ReviewViewSet: ('list',),
+    CommentViewSet: ('list',),
+}
+READ_METHODS = ('GET', 'HEAD')
+
+
+def run_view(view, request, *args, **kwargs):
+    """Выполняет представление в потоке и закрывает его соединение."""
+    try:
+        with counting_queries(QueryCounter()) as counter:
+            response = view(request, *args, **kwargs)
+        response.render()
+        # Запросы идут не в потоке middleware: число передаётся ему так.
+        request.query_count = counter.count
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """Асинхронная обёртка DRF-представления с чтением в пуле потоков."""
+    view_call = functools.partial(run_view, view)
+    read = sync_to_async(view_call, thread_sensitive=False)
+    other = sync_to_async(view_call, thread_sensitive=True)
+
+    async def async_view(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await read(request, *args, **kwargs)
+        return await other(request, *args, **kwargs)
+
+    # cls, actions и csrf_exempt читают middleware и тесты.
+    async_view.__dict__.update(view.__dict__)
+    async_view.__name__ = view.__name__
+    return async_view
+
+
+def with_async_reads(urlpatterns):
+    """Заменяет маршруты чтения из ASYNC_READ_ACTIONS асинхронными."""
+    patterns = []
+    for pattern in urlpatterns:
+        view = getattr(pattern, 'callback', None)
+        actions = getattr(view, 'actions', None) or {}
+        read_actions = ASYNC_READ_ACTIONS.get(getattr(view, 'cls', None), ())
+        if actions.get('get') in read_actions:
+            pattern = URLPattern(
+                pattern.pattern, async_read_view(view),
+                pattern.default_args, pattern.name)
+        patterns.append(pattern)
+    return patterns
@@ -0,0 +1,136 @@
+import copy
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.conf import settings
+from django.db import router, transaction
+
+from reviews.models import User
+
+from .cache import get_shared_cache
+from .lru import LRUCache
+
+# Поля пользователя, которые переносятся в токен.
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'ver'
+# Изменение этих полей отзывает выданные токены: иначе пользователь
+# запроса собирался бы из устаревших утверждений.
+REVOKING_FIELDS = USER_CLAIMS + ('is_active',)
+MISSING_USER = -1
+
+# Пользователи, загруженные при аутентификации, в памяти процесса.
+# Записи удаляются сигналами при изменении пользователя; в остальных
+# процессах они устаревают не дольше чем через TTL.
+user_cache = LRUCache(
+    settings.USER_CACHE['MAX_SIZE'], settings.USER_CACHE['TTL'])
+
+
+def token_version_key(user_id):
+    return f'token-version:{user_id}'
+
+
+def get_token_version(user_id):
+    """
+    Текущая версия токенов активного пользователя или None.
+
+    Значение берётся из общего для процессов кэша (`get_shared_cache`),
+    поэтому отзыв токенов сразу действует во всех процессах, которые его
+    видят; при промахе выполняется один запрос.
+    """
+    cache = get_shared_cache()
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is None:
+            version = MISSING_USER
+        cache.set(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return None if version == MISSING_USER else version
+
+
+def forget_user(user_id):
+    """Удаляет сведения о пользователе из кэшей аутентификации."""
+    _forget_user(user_id)
+    if transaction.get_connection().in_atomic_block:
+        # До фиксации транзакции другой процесс может снова прочитать и
+        # закэшировать прежнюю версию токенов.
+        transaction.on_commit(lambda: _forget_user(user_id))
+
+
+def _forget_user(user_id):
+    get_shared_cache().delete(token_version_key(user_id))
+    user_cache.delete(user_id)
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью и версией токенов пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token[VERSION_CLAIM] = user.token_version
+        return token
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация с кэшем пользователей в памяти процесса.
+
+    Каждый запрос получает свою копию объекта из кэша, поэтому
+    изменения в одном запросе не видны другим.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, copy.copy(user))
+            return user
+        return copy.copy(user)
+
+
+class StatelessJWTAuthentication(CachedUserJWTAuthentication):
+    """
+    JWT-аутентификация без загрузки пользователя из базы.
+
+    Пользователь собирается из утверждений `RoleAccessToken` как объект
+    модели с отложенными остальными полями: они подгрузятся при
+    обращении. Токен отклоняется, если версия в нём не совпадает с
+    текущей версией пользователя. Для токенов без утверждений о роли
+    пользователь загружается через кэш пользователей.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            claims = {
+                claim: validated_token[claim] for claim in USER_CLAIMS}
+        except KeyError:
+            return super().get_user(validated_token)
+
+        version = get_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found')
+        if version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван', code='token_revoked')
+
+        claims.update(id=user_id, is_active=True, token_version=version)
+        loaded = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in claims
+        ]
+        return User.from_db(
+            router.db_for_read(User), loaded,
+            [claims[name] for name in loaded])
@@ -0,0 +1,115 @@
+"""
+Бюджет SQL-запросов на запрос к API.
+
+Представление объявляет атрибут `query_budget`: число запросов для всех
+действий или словарь по действию (`list`, `retrieve`, …) либо HTTP-методу
+(`get`, `post`, …). `QueryBudgetMiddleware` считает запросы к базе за
+весь HTTP-запрос и при превышении бюджета пишет предупреждение в лог
+(`QUERY_BUDGET_MODE = 'log'`) или выбрасывает `QueryBudgetExceeded`
+(`'raise'`, для тестов). Бюджет списка не зависит от размера страницы:
+превышение на больших страницах означает N+1.
+
+Под ASGI запросы выполняются не в потоке middleware: их считает
+обёртка асинхронного представления (`api.async_views`) и передаёт число
+в `request.query_count`.
+"""
+import logging
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+MODES = ('off', 'log', 'raise')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_query_budget(view_class, action=None, method=None):
+    """Бюджет действия или метода представления; None — без бюджета."""
+    budget = getattr(view_class, 'query_budget', None)
+    if not isinstance(budget, dict):
+        return budget
+    for key in (action, method and method.lower()):
+        if key in budget:
+            return budget[key]
+    return None
+
+
+class QueryCounter:
+    """Обёртка выполнения запросов, считающая их число."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def counting_queries(counter):
+    """Считает запросы потока ко всем базам, включая реплику."""
+    with ExitStack() as stack:
+        for db in connections.all():
+            stack.enter_context(db.execute_wrapper(counter))
+        yield counter
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if settings.QUERY_BUDGET_MODE == 'off':
+            return self.get_response(request)
+        request.query_budget = None
+        with counting_queries(QueryCounter()) as counter:
+            response = self.get_response(request)
+        self.check(request, response,
+                   getattr(request, 'query_count', counter.count))
+        return response
+
+    async def __acall__(self, request):
+        if settings.QUERY_BUDGET_MODE == 'off':
+            return await self.get_response(request)
+        request.query_budget = None
+        response = await self.get_response(request)
+        # Запросы синхронных представлений под ASGI не считаются.
+        if hasattr(request, 'query_count'):
+            self.check(request, response, request.query_count)
+        return response
+
+    def check(self, request, response, count):
+        response['X-Query-Count'] = count
+        budget = request.query_budget
+        if budget is not None and count > budget:
+            message = (
+                f'{request.method} {request.get_full_path()}: '
+                f'{count} SQL-запросов при бюджете {budget}')
+            if settings.QUERY_BUDGET_MODE == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is None or settings.QUERY_BUDGET_MODE == 'off':
+            return None
+        # Для ViewSet действие определяется методом запроса.
+        actions = getattr(view_func, 'actions', None) or {}
+        request.query_budget = get_query_budget(
+            view_class, actions.get(request.method.lower()), request.method)
+        return None
@@ -0,0 +1,301 @@
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .renderers import Fragments
+
+STATS_KEYS = ('stats:hits', 'stats:misses')
+# Не чаще чем раз в столько секунд счётчики процесса переносятся в кэш.
+COUNTERS_FLUSH_INTERVAL = 10
+# Число корзин версий объектов на вид имени (см. version_key).
+VERSION_BUCKETS = 1024
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_shared_cache():
+    """
+    Кэш, общий для всех процессов: версии, версии токенов, отметки
+    чтения из основной базы.
+
+    Записи кэша ответов в памяти процесса можно не сбрасывать: их ключи
+    содержат версии, и после изменения в любом процессе они перестают
+    запрашиваться. Сами версии должен видеть каждый процесс.
+    """
+    return caches[settings.API_SHARED_CACHE_ALIAS]
+
+
+def isolated_caches(directory):
+    """
+    Настройки CACHES, в которых файловые кэши перенесены в directory.
+
+    Для команд, работающих с отдельной тестовой базой: данные и версии
+    этой базы не должны попасть в кэши основной. Кэш в базе данных
+    и так находится в тестовой базе.
+    """
+    return {
+        alias: (
+            {**config, 'LOCATION': os.path.join(directory, alias)}
+            if issubclass(import_string(config['BACKEND']), FileBasedCache)
+            else config)
+        for alias, config in settings.CACHES.items()
+    }
+
+
+def _now():
+    return time.time_ns() // 1000
+
+
+def version_key(name):
+    """
+    Ключ версии в общем кэше.
+
+    Номер объекта в имени (`titles:5`, `titles:5:name`) заменяется
+    корзиной `номер % VERSION_BUCKETS`: число ключей не растёт вместе с
+    каталогом, а совпадение корзин только делает устаревшими лишние
+    записи кэша.
+    """
+    parts = name.split(':')
+    numbers = [int(part) for part in parts if part.isdigit()]
+    if not numbers:
+        return f'version:{name}'
+    shape = ':'.join('#' if part.isdigit() else part for part in parts)
+    buckets = '.'.join(str(number % VERSION_BUCKETS) for number in numbers)
+    return f'version:{shape}:{buckets}'
+
+
+def get_versions(*names, initial=None):
+    """
+    Возвращает текущие версии по именам.
+
+    Версия — отметка времени последнего изменения в микросекундах.
+    Отсутствующая (новая или вытесненная) версия инициализируется
+    текущим временем (или недавним моментом `initial`), поэтому не может
+    совпасть с прежним значением.
+    """
+    cache = get_shared_cache()
+    keys = [version_key(name) for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            value = initial or _now()
+            if not cache.add(key, value, None):
+                value = cache.get(key, value)
+            versions[key] = value
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*names):
+    """Сдвигает версии вперёд, делая зависимые записи кэша устаревшими."""
+    _bump_versions(names)
+    if transaction.get_connection().in_atomic_block:
+        # Ответ, закэшированный до фиксации транзакции, построен по старым
+        # данным: после фиксации версии сдвигаются ещё раз.
+        transaction.on_commit(lambda: _bump_versions(names))
+
+
+def _bump_versions(names):
+    cache = get_shared_cache()
+    keys = [version_key(name) for name in names]
+    current = cache.get_many(keys)
+    now = _now()
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys}, None)
+
+
+class Counters:
+    """
+    Счётчики в памяти процесса.
+
+    В кэш API они переносятся не чаще раза в `COUNTERS_FLUSH_INTERVAL`
+    секунд и при чтении статистики: попадание в кэш не должно быть
+    записью в кэш (с бэкендом db — в базу данных). Другие процессы
+    видят значения с этой задержкой.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+
+    def count(self, key):
+        with self.lock:
+            self.pending[key] += 1
+            if time.monotonic() - self.flushed_at < COUNTERS_FLUSH_INTERVAL:
+                return
+            pending = self.take()
+        self.save(pending)
+
+    def flush(self):
+        with self.lock:
+            pending = self.take()
+        self.save(pending)
+
+    def clear(self):
+        with self.lock:
+            self.take()
+
+    def take(self):
+        pending, self.pending = self.pending, Counter()
+        self.flushed_at = time.monotonic()
+        return pending
+
+    @staticmethod
+    def save(pending):
+        cache = get_cache()
+        for key, value in pending.items():
+            try:
+                cache.incr(key, value)
+            except ValueError:
+                cache.add(key, 0, None)
+                cache.incr(key, value)
+
+
+counters = Counters()
+
+
+def get_cache_stats():
+    """Счётчики попаданий и промахов кэша ответов."""
+    counters.flush()
+    values = get_cache().get_many(STATS_KEYS)
+    return {
+        'hits': values.get('stats:hits', 0),
+        'misses': values.get('stats:misses', 0),
+    }
+
+
+class CachedResponseMixin:
+    """
+    Общая часть кэширования ответов list/retrieve.
+
+    Ключ строится из хоста, пути и отсортированных параметров запроса
+    (включая номер страницы) и из версий, от которых зависит ответ.
+    Версии сдвигаются сигналами в `api.signals`, поэтому устаревшие
+    записи просто перестают запрашиваться и вытесняются по таймауту.
+    """
+    cache_namespace = None
+
+    def get_cache_version_names(self):
+        namespace = self.cache_namespace
+        if self.action == 'retrieve':
+            lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            return (namespace, f'{namespace}:{lookup}')
+        return (namespace, f'{namespace}:list')
+
+    def get_cache_key(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        versions = get_versions(*self.get_cache_version_names())
+        raw = f'{request.get_host()}{request.path}?{query}|{versions}'
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'response:{self.cache_namespace}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            counters.count('stats:hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        counters.count('stats:misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Кэширование ответов list."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Кэширование ответов retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class FragmentListMixin:
+    """
+    Ответы list из закэшированных JSON-представлений объектов.
+
+    Представление объекта хранится под ключом из версий
+    `get_fragment_version_names(instance)` и общих для всех объектов
+    версий `fragment_version_names`; сигналы в `api.signals` сдвигают их
+    при изменении объекта и всего, что выводится в его представлении.
+    Сериализуются только объекты без готового фрагмента, ответ
+    собирается из фрагментов (`FragmentJSONRenderer`). Представление
+    объекта не должно зависеть от запроса.
+    """
+    fragment_namespace = None
+    fragment_version_names = ()
+
+    def get_fragment_version_names(self, instance):
+        raise NotImplementedError
+
+    def get_fragment_shared_version_names(self):
+        return self.fragment_version_names
+
+    def list(self, request, *args, **kwargs):
+        started = _now()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_fragments(page, started))
+        return Response(self.get_fragments(queryset, started))
+
+    def get_fragments(self, instances, started):
+        instances = list(instances)
+        shared = tuple(self.get_fragment_shared_version_names())
+        names = [
+            shared + tuple(self.get_fragment_version_names(instance))
+            for instance in instances
+        ]
+        unique = list(dict.fromkeys(
+            name for group in names for name in group))
+        # Версии, которых ещё нет, не менялись с начала запроса.
+        versions = dict(zip(unique, get_versions(*unique, initial=started)))
+        keys = [
+            f'fragment:{self.fragment_namespace}:{instance.pk}:'
+            + '.'.join(str(versions[name]) for name in group)
+            for instance, group in zip(instances, names)
+        ]
+        cache = get_cache()
+        fragments = cache.get_many(keys)
+        missed = [
+            index for index, key in enumerate(keys) if key not in fragments]
+        if missed:
+            data = self.get_serializer(
+                [instances[index] for index in missed], many=True).data
+            renderer = JSONRenderer()
+            fresh = {}
+            for index, item in zip(missed, data):
+                fragment = renderer.render(item)
+                fragments[keys[index]] = fragment
+                # Версия, сдвинутая после начала запроса, могла опередить
+                # прочитанные данные: такой фрагмент не сохраняется.
+                if all(versions[name] <= started for name in names[index]):
+                    fresh[keys[index]] = fragment
+            cache.set_many(fresh, settings.API_CACHE_TIMEOUT)
+        return Fragments(fragments[key] for key in keys)
@@ -0,0 +1,36 @@
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class SharedFileCache(FileBasedCache):
+    """
+    Файловый кэш, запись в который не просматривает каталог.
+
+    FileBasedCache перед каждой записью перечисляет все файлы каталога
+    (`_cull`), и запись стоит O(числа записей). Здесь каталог
+    просматривается не чаще раза в `cull_interval` секунд на экземпляр:
+    сначала удаляются истёкшие записи, затем, если записей больше
+    MAX_ENTRIES, — случайная доля, как в FileBasedCache.
+    """
+    cull_interval = 300
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._culled_at = time.monotonic()
+
+    def _cull(self):
+        now = time.monotonic()
+        if now - self._culled_at < self.cull_interval:
+            return
+        self._culled_at = now
+        self.delete_expired()
+        super()._cull()
+
+    def delete_expired(self):
+        for fname in self._list_cache_files():
+            try:
+                with open(fname, 'rb') as cache_file:
+                    self._is_expired(cache_file)
+            except FileNotFoundError:
+                pass
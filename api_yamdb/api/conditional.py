@@ -0,0 +1,62 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_versions
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list/retrieve.
+
+    Валидаторы считаются до обращения к сериализатору: при совпадении
+    `If-None-Match` (или `If-Modified-Since`, если ETag не передан)
+    сразу возвращается 304. Подклассы задают `get_validators()`.
+    Подходит только для представлений, где есть и list, и retrieve.
+    """
+
+    def get_validators(self):
+        """Возвращает кортеж значений для ETag и момент изменения."""
+        raise NotImplementedError
+
+    def get_version_validators(self, *names):
+        versions = get_versions(*names)
+        last_modified = datetime.fromtimestamp(
+            max(versions) / 1_000_000, tz=timezone.utc)
+        return tuple(versions), last_modified
+
+    def get_queryset_validators(self, queryset, *names,
+                                last_field='pub_date'):
+        """Валидаторы по версиям, числу строк и max(last_field)."""
+        versions, last_modified = self.get_version_validators(*names)
+        stats = queryset.order_by().aggregate(
+            count=Count('pk'), last=Max(last_field))
+        if isinstance(stats['last'], datetime):
+            last_modified = max(last_modified, stats['last'])
+        return versions + (stats['count'], stats['last']), last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        parts, last_modified = self.get_validators()
+        raw = f'{request.get_full_path()}|{parts}'
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
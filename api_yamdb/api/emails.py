@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import send_mail
+
+from reviews.models import OutboxEmail
+
+
+def send_confirmation_code(user):
+    """
+    Отправляет пользователю код подтверждения.
+
+    При `EMAIL_OUTBOX_ENABLED` письмо только ставится в очередь, а
+    отправляет его команда `send_emails`.
+    """
+    confirmation_code = default_token_generator.make_token(user)
+    email_data = {
+        'subject': 'Добро пожаловать на наш сайт!',
+        'message': f'Ваш код подтверждения: {confirmation_code}',
+        'from_email': settings.TOKEN_EMAIL,
+    }
+    if settings.EMAIL_OUTBOX_ENABLED:
+        OutboxEmail.objects.create(recipient=user.email, **email_data)
+    else:
+        send_mail(recipient_list=[user.email], **email_data)
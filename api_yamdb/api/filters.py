@@ -1,18 +1,82 @@
 from django_filters import rest_framework as filters
 
-from reviews.models import Title
+from django.db import connections
+from django.db.models import Q
+
+from reviews.models import GenreTitle, Title
+
+MAX_CHAR = chr(0x10FFFF)
+
+
+def prefix_condition(queryset, field, prefix):
+    """
+    Условие «значение начинается с prefix», использующее индекс поля.
+
+    В SQLite LIKE не использует индекс с обычной (BINARY) сортировкой,
+    поэтому к нему добавляется равносильный диапазон [prefix, следующая
+    строка). В PostgreSQL для LIKE 'prefix%' есть индексы *_like,
+    которые Django создаёт для индексированных строковых полей.
+    """
+    condition = Q(**{f'{field}__startswith': prefix})
+    if connections[queryset.db].vendor == 'sqlite' and prefix[-1] < MAX_CHAR:
+        condition &= Q(**{
+            f'{field}__gte': prefix,
+            f'{field}__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1),
+        })
+    return condition
+
+
+def split_values(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
-    )
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
-    )
+    """
+    Фильтры произведений.
+
+    Жанр и категория ищутся по точному slug или по его началу. Несколько
+    жанров передаются через запятую: `genre_match=any` (по умолчанию)
+    оставляет произведения хотя бы с одним из них, `all` — со всеми.
+    Жанры проверяются подзапросами `id IN (...)`: подзапрос выполняется
+    один раз по индексам slug и (genre, title), строки произведений не
+    дублируются и не нужен DISTINCT.
+    """
+    genre = filters.CharFilter(method='filter_genre')
+    genre_prefix = filters.CharFilter(method='filter_genre_prefix')
+    genre_match = filters.ChoiceFilter(
+        choices=(('any', 'any'), ('all', 'all')), method='skip')
+    category = filters.CharFilter(field_name='category__slug')
+    category_prefix = filters.CharFilter(method='filter_prefix',
+                                         field_name='category__slug')
+    name_prefix = filters.CharFilter(method='filter_prefix',
+                                     field_name='name')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
 
     class Meta:
         model = Title
         fields = '__all__'
+
+    def skip(self, queryset, name, value):
+        return queryset
+
+    def with_genres(self, queryset, condition):
+        return queryset.filter(pk__in=GenreTitle.objects.filter(
+            condition).values('title_id'))
+
+    def filter_genre(self, queryset, name, value):
+        slugs = split_values(value)
+        if not slugs:
+            return queryset
+        if self.form.cleaned_data.get('genre_match') == 'all':
+            for slug in slugs:
+                queryset = self.with_genres(queryset, Q(genre__slug=slug))
+            return queryset
+        return self.with_genres(queryset, Q(genre__slug__in=slugs))
+
+    def filter_genre_prefix(self, queryset, name, value):
+        return self.with_genres(
+            queryset, prefix_condition(queryset, 'genre__slug', value))
+
+    def filter_prefix(self, queryset, name, value):
+        return queryset.filter(prefix_condition(queryset, name, value))
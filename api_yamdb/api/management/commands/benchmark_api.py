@@ -0,0 +1,386 @@
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from itertools import count
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from rest_framework.test import APIClient
+
+import django
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.authentication import RoleAccessToken, user_cache
+from api.cache import isolated_caches
+from reviews.management.commands.generate_dataset import generate
+from reviews.models import Comment, Genre, Title, User
+
+DATASET = (('users', 50), ('categories', 10), ('genres', 20),
+           ('titles', 200), ('reviews', 2000), ('comments', 4000))
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def parse(content):
+    try:
+        return json.loads(content) if content else None
+    except ValueError:
+        return None
+
+
+def count_rows(body):
+    if isinstance(body, dict) and isinstance(body.get('results'), list):
+        return len(body['results'])
+    if isinstance(body, list):
+        return len(body)
+    return 1
+
+
+class Endpoint:
+    """Запрос к API; путь и тело могут зависеть от номера запроса."""
+
+    def __init__(self, name, method, path, data=None, token=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.token = token
+        self.counter = count()
+
+    def next_request(self):
+        index = next(self.counter)
+        path = self.path(index) if callable(self.path) else self.path
+        data = self.data(index) if callable(self.data) else self.data
+        return path, data
+
+
+class ClientTransport:
+    """Тестовый клиент Django: запрос без сети и сервера."""
+    name = 'client'
+
+    def __enter__(self):
+        self.client = APIClient()
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def request(self, endpoint, path, data):
+        headers = {}
+        if endpoint.token:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {endpoint.token}'
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, endpoint.method.lower())(
+                path, data=data, format='json', **headers)
+        return (response.status_code, parse(response.content),
+                len(context.captured_queries))
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+class WSGITransport:
+    """Запросы по HTTP к WSGI-серверу, запущенному в отдельном потоке."""
+    name = 'wsgi'
+
+    def __enter__(self):
+        handler = WSGIHandler()
+        self.queries = []
+
+        def application(environ, start_response):
+            executed = []
+
+            def counter(execute, sql, params, many, context):
+                executed.append(sql)
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(counter):
+                response = handler(environ, start_response)
+            self.queries.append(len(executed))
+            return response
+
+        self.server = make_server(
+            '127.0.0.1', 0, application, handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve(self):
+        try:
+            self.server.serve_forever(poll_interval=0.1)
+        finally:
+            connections.close_all()
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def request(self, endpoint, path, data):
+        headers = {'Host': 'testserver'}
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        if endpoint.token:
+            headers['Authorization'] = f'Bearer {endpoint.token}'
+        http = HTTPConnection(*self.server.server_address)
+        try:
+            http.request(endpoint.method, path, body=body, headers=headers)
+            response = http.getresponse()
+            content = response.read()
+        finally:
+            http.close()
+        return (response.status, parse(content),
+                self.queries.pop() if self.queries else 0)
+
+
+TRANSPORTS = {'client': ClientTransport, 'wsgi': WSGITransport}
+
+
+class Command(BaseCommand):
+    help = ('Benchmark every API endpoint on a synthetic dataset in a '
+            'separate test database')
+
+    def add_arguments(self, parser):
+        for name, default in DATASET:
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Размер набора данных (по умолчанию {default})')
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Число измеряемых запросов к каждому эндпоинту')
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Число запросов перед измерением')
+        parser.add_argument(
+            '--transport', choices=('client', 'wsgi', 'both'),
+            default='both', help='Тестовый клиент, WSGI-сервер или оба')
+        parser.add_argument(
+            '--cold-cache', action='store_true',
+            help='Очищать кэши перед каждым запросом')
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Файл с результатами в формате JSON')
+
+    def handle(self, *args, **options):
+        if options['requests'] <= 0:
+            raise CommandError('Число запросов должно быть больше нуля.')
+        self.options = options
+        transports = (
+            list(TRANSPORTS) if options['transport'] == 'both'
+            else [options['transport']])
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Соединение с базой в памяти Django не закрывает, и команда
+            # не смогла бы переключиться на свою тестовую базу.
+            raise CommandError('Замеры на базе в памяти невозможны.')
+        old_name = connection.settings_dict['NAME']
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        old_test_name = test_settings.get('NAME')
+        if connection.vendor == 'sqlite':
+            # База в памяти недоступна потоку WSGI-сервера.
+            test_settings['NAME'] = os.path.join(
+                tempfile.mkdtemp(), 'benchmark.sqlite3')
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(**self.benchmark_settings()):
+                self.clear_caches()
+                dataset = self.generate()
+                endpoints = self.endpoints()
+                results = [
+                    self.measure(TRANSPORTS[name], endpoint)
+                    for name in transports for endpoint in endpoints
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = old_test_name
+        report = {
+            'meta': self.meta(transports),
+            'dataset': dataset,
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f'Results written to {options["output"]}'))
+
+    def benchmark_settings(self):
+        rates = {
+            scope: '1000000/min'
+            for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+        }
+        return {
+            'REST_FRAMEWORK': {
+                **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates},
+            # Версии и ответы тестовой базы не попадают в общие кэши.
+            'CACHES': isolated_caches(tempfile.mkdtemp()),
+            'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+            'ALLOWED_HOSTS': ['testserver', '127.0.0.1', 'localhost'],
+        }
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+        user_cache.clear()
+
+    def generate(self):
+        sizes = {name: self.options[name] for name, _ in DATASET}
+        started = time.monotonic()
+        created = generate(**sizes)
+        elapsed = time.monotonic() - started
+        call_command('recompute_ratings', stdout=open(os.devnull, 'w'))
+        call_command('rebuild_search_index', stdout=open(os.devnull, 'w'))
+        rows = sum(created.values())
+        self.stdout.write(
+            f'dataset: {rows} rows, {rows / elapsed:.0f} rows/s')
+        return {
+            'rows': created,
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(rows / elapsed, 1) if elapsed else None,
+        }
+
+    def endpoints(self):
+        admin = User.objects.create(
+            username='bench_admin', email='bench_admin@yamdb.fake',
+            role='admin')
+        author = User.objects.create(
+            username='bench_author', email='bench_author@yamdb.fake')
+        admin_token = str(RoleAccessToken.for_user(admin))
+        author_token = str(RoleAccessToken.for_user(author))
+        comment = Comment.objects.select_related('review').first()
+        review = comment.review
+        title_id = review.title_id
+        genre = Genre.objects.first()
+        # Пишущие запросы создают отзыв к новому произведению каждый раз.
+        titles = list(Title.objects.order_by('id').values_list(
+            'id', flat=True))
+        needed = ((self.options['warmup'] + self.options['requests'])
+                  * (2 if self.options['transport'] == 'both' else 1))
+        if len(titles) < needed:
+            raise CommandError(
+                f'Для пишущих запросов нужно не меньше {needed} '
+                f'произведений.')
+        code = default_token_generator.make_token(author)
+        reviews = f'/api/v1/titles/{title_id}/reviews/'
+        comments = f'{reviews}{review.id}/comments/'
+        return [
+            Endpoint('titles', 'GET', '/api/v1/titles/'),
+            Endpoint('titles?genre', 'GET',
+                     f'/api/v1/titles/?genre={genre.slug}'),
+            Endpoint('titles?cursor', 'GET', '/api/v1/titles/?cursor='),
+            Endpoint('title', 'GET', f'/api/v1/titles/{title_id}/'),
+            Endpoint('reviews', 'GET', reviews),
+            Endpoint('review', 'GET', f'{reviews}{review.id}/'),
+            Endpoint('comments', 'GET', comments),
+            Endpoint('comment', 'GET', f'{comments}{comment.id}/'),
+            Endpoint('genres', 'GET', '/api/v1/genres/'),
+            Endpoint('categories', 'GET', '/api/v1/categories/'),
+            Endpoint('search', 'GET',
+                     f'/api/v1/search/?{urlencode({"q": "дракон"})}'),
+            Endpoint('users', 'GET', '/api/v1/users/', token=admin_token),
+            Endpoint('user', 'GET', f'/api/v1/users/{author.username}/',
+                     token=admin_token),
+            Endpoint('users/me', 'GET', '/api/v1/users/me/',
+                     token=author_token),
+            Endpoint('signup', 'POST', '/api/v1/auth/signup/',
+                     lambda index: {'username': f'bench{index}',
+                                    'email': f'bench{index}@yamdb.fake'}),
+            Endpoint('token', 'POST', '/api/v1/auth/token/',
+                     {'username': author.username,
+                      'confirmation_code': code}),
+            Endpoint('genres:create', 'POST', '/api/v1/genres/',
+                     lambda index: {'name': f'Жанр {index}',
+                                    'slug': f'bench-{index}'},
+                     token=admin_token),
+            Endpoint('reviews:create', 'POST',
+                     lambda index: f'/api/v1/titles/{titles[index]}/reviews/',
+                     {'text': 'Отзыв', 'score': 7}, token=author_token),
+            Endpoint('reviews:batch', 'POST', '/api/v1/reviews/batch/',
+                     lambda index: [{'title': titles[index],
+                                     'text': 'Отзыв', 'score': 5}],
+                     token=admin_token),
+            Endpoint('comments:create', 'POST', comments,
+                     {'text': 'Комментарий'}, token=author_token),
+        ]
+
+    def measure(self, transport_class, endpoint):
+        timings = []
+        queries = []
+        rows = 0
+        statuses = {}
+        warmup = self.options['warmup']
+        with transport_class() as transport:
+            for index in range(warmup + self.options['requests']):
+                if self.options['cold_cache']:
+                    self.clear_caches()
+                path, data = endpoint.next_request()
+                started = time.perf_counter()
+                status, body, executed = transport.request(
+                    endpoint, path, data)
+                elapsed = time.perf_counter() - started
+                if index < warmup:
+                    continue
+                timings.append(elapsed * 1000)
+                queries.append(executed)
+                rows += count_rows(body) if status < 400 else 0
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+        total = sum(timings) / 1000
+        result = {
+            'endpoint': endpoint.name,
+            'method': endpoint.method,
+            'transport': transport_class.name,
+            'requests': len(timings),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'queries_per_request': round(sum(queries) / len(queries), 2),
+            'rows_per_sec': round(rows / total, 1) if total else None,
+            'status_codes': statuses,
+        }
+        self.stdout.write(
+            f'{result["transport"]:6} {endpoint.method:4} '
+            f'{endpoint.name:16} p50 {result["p50_ms"]:8.2f} ms  '
+            f'p95 {result["p95_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} '
+            f'ms  queries {result["queries_per_request"]:6.2f}  '
+            f'status {statuses}')
+        return result
+
+    def meta(self, transports):
+        try:
+            commit = subprocess.run(
+                ('git', 'rev-parse', 'HEAD'), cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'transports': transports,
+            'requests': self.options['requests'],
+            'warmup': self.options['warmup'],
+            'cold_cache': self.options['cold_cache'],
+        }
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from api.async_views import with_async_reads
+from api.authentication import RoleAccessToken
+from api.cache import isolated_caches
+from api.urls import router
+from reviews.management.commands.generate_dataset import generate
+from reviews.models import Review, Title, User
+
+from .benchmark_api import percentile
+
+# asgi-sync — ASGI с синхронными представлениями DRF, asgi — с
+# асинхронным чтением (api.async_views).
+SERVERS = ('wsgi', 'asgi-sync', 'asgi')
+
+
+def make_urlconf(async_reads):
+    urls = router.urls
+    urlconf = ModuleType('benchmark_urls')
+    urlconf.urlpatterns = [
+        path('api/v1/', include(
+            with_async_reads(urls) if async_reads else urls)),
+    ]
+    return urlconf
+
+
+def split_path(full_path):
+    path_info, _, query = full_path.partition('?')
+    return path_info, query
+
+
+class WSGIServer:
+    """WSGIHandler в пуле потоков, как у многопоточного WSGI-сервера."""
+
+    def __init__(self, concurrency, token):
+        self.concurrency = concurrency
+        self.token = token
+
+    def run(self, paths):
+        handler = WSGIHandler()
+
+        def request(full_path):
+            path_info, query = split_path(full_path)
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path_info,
+                'QUERY_STRING': query,
+                'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+            }
+            setup_testing_defaults(environ)
+            statuses = []
+            started = time.perf_counter()
+            response = handler(
+                environ, lambda status, headers, exc_info=None:
+                statuses.append(status))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            elapsed = time.perf_counter() - started
+            return int(statuses[0].split()[0]), elapsed
+
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            return list(executor.map(request, paths))
+
+
+class ASGIServer:
+    """ASGIHandler в цикле событий с concurrency одновременных запросов."""
+
+    def __init__(self, concurrency, token):
+        self.concurrency = concurrency
+        self.token = token
+
+    def run(self, paths):
+        return asyncio.run(self.run_async(paths))
+
+    async def run_async(self, paths):
+        handler = ASGIHandler()
+        pending = iter(paths)
+        results = []
+
+        async def worker():
+            for full_path in pending:
+                results.append(await self.request(handler, full_path))
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return results
+
+    async def request(self, handler, full_path):
+        path_info, query = split_path(full_path)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path_info,
+            'raw_path': path_info.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'authorization', f'Bearer {self.token}'.encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        status = None
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+        started = time.perf_counter()
+        await handler(scope, receive, send)
+        return status, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = ('Compare sync WSGI and async ASGI throughput of the title, '
+            'review and comment read endpoints at high concurrency')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help='Число одновременных запросов')
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help='Число измеряемых запросов к каждому серверу')
+        parser.add_argument(
+            '--warmup', type=int, default=100,
+            help='Число запросов перед измерением')
+        parser.add_argument(
+            '--titles', type=int, default=200,
+            help='Число произведений в наборе данных')
+        parser.add_argument(
+            '--server', choices=SERVERS + ('all',), default='all',
+            help='Способ обслуживания запросов или все по очереди')
+        parser.add_argument(
+            '--response-cache', action='store_true',
+            help='Не отключать кэш ответов API')
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError(
+                'Число запросов и одновременных запросов должно быть '
+                'больше нуля.')
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError('Замеры на базе в памяти невозможны.')
+        self.options = options
+        servers = (
+            SERVERS if options['server'] == 'all' else (options['server'],))
+        old_name = connection.settings_dict['NAME']
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        old_test_name = test_settings.get('NAME')
+        if connection.vendor == 'sqlite':
+            # База в памяти недоступна потокам обработчиков.
+            test_settings['NAME'] = os.path.join(
+                tempfile.mkdtemp(), 'benchmark.sqlite3')
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(**self.benchmark_settings()):
+                paths, token = self.prepare()
+                results = [
+                    self.measure(server, paths, token) for server in servers]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = old_test_name
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+
+    def benchmark_settings(self):
+        rates = {
+            scope: '1000000/min'
+            for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+        }
+        overrides = {
+            'REST_FRAMEWORK': {
+                **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates},
+            # Версии и ответы тестовой базы не попадают в общие кэши.
+            'CACHES': isolated_caches(tempfile.mkdtemp()),
+        }
+        if not self.options['response_cache']:
+            # Ответы кэшируются на 0 секунд: каждый запрос доходит до базы.
+            overrides['API_CACHE_TIMEOUT'] = 0
+        return overrides
+
+    def prepare(self):
+        titles = self.options['titles']
+        generate(users=20, categories=5, genres=10, titles=titles,
+                 reviews=titles * 5, comments=titles * 5)
+        call_command('recompute_ratings', stdout=open(os.devnull, 'w'))
+        reader = User.objects.create(
+            username='bench_reader', email='bench_reader@yamdb.fake')
+        token = str(RoleAccessToken.for_user(reader))
+        title_ids = list(Title.objects.values_list('id', flat=True))
+        reviews = list(Review.objects.filter(
+            comment__isnull=False).values_list('title_id', 'id').distinct())
+        pages = max(1, titles // 10)
+        total = self.options['warmup'] + self.options['requests']
+        paths = []
+        for index in range(total):
+            title_id = title_ids[index % len(title_ids)]
+            review_title_id, review_id = reviews[index % len(reviews)]
+            paths.append((
+                f'/api/v1/titles/?page={index % pages + 1}',
+                f'/api/v1/titles/{title_id}/',
+                f'/api/v1/titles/{title_id}/reviews/',
+                f'/api/v1/titles/{review_title_id}/reviews/{review_id}/'
+                f'comments/',
+            )[index % 4])
+        # Потоки обработчиков открывают свои соединения.
+        connections.close_all()
+        return paths, token
+
+    def measure(self, server, paths, token):
+        concurrency = self.options['concurrency']
+        server_class = WSGIServer if server == 'wsgi' else ASGIServer
+        warmup = self.options['warmup']
+        with override_settings(ROOT_URLCONF=make_urlconf(server == 'asgi')):
+            runner = server_class(concurrency, token)
+            runner.run(paths[:warmup])
+            started = time.perf_counter()
+            samples = runner.run(paths[warmup:])
+            elapsed = time.perf_counter() - started
+        connections.close_all()
+        latencies = [seconds * 1000 for _, seconds in samples]
+        statuses = {}
+        for status, _ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        result = {
+            'server': server,
+            'concurrency': concurrency,
+            'requests': len(samples),
+            'seconds': round(elapsed, 3),
+            'requests_per_sec': round(len(samples) / elapsed, 1),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'status_codes': statuses,
+        }
+        self.stdout.write(
+            f'{server:9} {result["requests_per_sec"]:8.1f} req/s  '
+            f'p50 {result["p50_ms"]:8.2f} ms  p95 {result["p95_ms"]:8.2f} '
+            f'ms  p99 {result["p99_ms"]:8.2f} ms  status {statuses}')
+        return result
@@ -0,0 +1,325 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from itertools import count
+
+from rest_framework.test import APIClient
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+
+from api.authentication import RoleAccessToken
+from api.cache import isolated_caches
+from api.writer import writer
+from reviews.management.commands.generate_dataset import generate
+from reviews.models import Review, User
+
+from .benchmark_api import percentile
+
+WRITE_STATEMENTS = ('BEGIN', 'INSERT', 'UPDATE', 'DELETE')
+# default — настройки SQLite и Django по умолчанию, write-queue —
+# настройки из DATABASES и запись через поток-писатель (api.writer).
+PROFILES = ('production', 'default', 'write-queue')
+
+
+class StatementRecorder:
+    """
+    Время пишущих SQL-команд и число ошибок `database is locked`.
+
+    Ожидание блокировки записи происходит внутри этих команд (с
+    `BEGIN IMMEDIATE` — внутри самого BEGIN), поэтому их время — оценка
+    ожидания блокировок сверху.
+    """
+
+    def __init__(self):
+        self.write_ms = []
+        self.locked = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(WRITE_STATEMENTS):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if 'locked' in str(error):
+                self.locked += 1
+            raise
+        finally:
+            self.write_ms.append((time.perf_counter() - started) * 1000)
+
+
+def run_process(role, tokens, targets, start_at, deadline, seed):
+    """Потоки процесса, по одному на токен; возвращает общие замеры."""
+    samples = [None] * len(tokens)
+
+    def run(index, token):
+        samples[index] = run_client(
+            role, token, targets, start_at, deadline, seed * 1000 + index)
+
+    threads = [
+        threading.Thread(target=run, args=(index, token))
+        for index, token in enumerate(tokens)
+    ]
+    operations, batches = writer.operations, writer.batches
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'role': role,
+        'latencies': [
+            value for sample in samples for value in sample['latencies']],
+        'statuses': {
+            code: sum(sample['statuses'].get(code, 0) for sample in samples)
+            for code in {code for sample in samples
+                         for code in sample['statuses']}
+        },
+        'write_ms': [
+            value for sample in samples for value in sample['write_ms']],
+        'locked': sum(sample['locked'] for sample in samples),
+        'queue_operations': writer.operations - operations,
+        'queue_batches': writer.batches - batches,
+    }
+
+
+def run_client(role, token, targets, start_at, deadline, seed):
+    """
+    Запросы одного потока с start_at до deadline.
+
+    Читатель запрашивает списки отзывов и комментариев, писатель по
+    очереди создаёт отзыв к следующему произведению и комментарий.
+    """
+    rng = random.Random(seed)
+    client = APIClient(raise_request_exception=False)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    title_ids = sorted({title_id for title_id, _ in targets})
+    rng.shuffle(title_ids)
+    titles = iter(title_ids)
+    recorder = StatementRecorder()
+    latencies = []
+    statuses = {}
+    time.sleep(max(0, start_at - time.time()))
+    with connection.execute_wrapper(recorder):
+        for step in count():
+            if time.time() >= deadline:
+                break
+            title_id, review_id = rng.choice(targets)
+            reviews = f'/api/v1/titles/{title_id}/reviews/'
+            comments = f'{reviews}{review_id}/comments/'
+            started = time.perf_counter()
+            if role == 'reader':
+                response = client.get(reviews if step % 2 else comments)
+            else:
+                title_id = next(titles, None) if step % 2 else None
+                if title_id is None:
+                    response = client.post(
+                        comments, {'text': 'Комментарий'}, format='json')
+                else:
+                    response = client.post(
+                        f'/api/v1/titles/{title_id}/reviews/',
+                        {'text': 'Отзыв', 'score': 7}, format='json')
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = (
+                statuses.get(response.status_code, 0) + 1)
+    connections.close_all()
+    return {
+        'latencies': latencies,
+        'statuses': statuses,
+        'write_ms': recorder.write_ms,
+        'locked': recorder.locked,
+    }
+
+
+def summarize(values):
+    if not values:
+        return None
+    return {
+        'p50_ms': round(percentile(values, 50), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'p99_ms': round(percentile(values, 99), 3),
+        'max_ms': round(max(values), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Run concurrent reader and writer processes against the review '
+            'and comment endpoints on a file SQLite database')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4, help='Число читающих процессов')
+        parser.add_argument(
+            '--writers', type=int, default=2, help='Число пишущих процессов')
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Число потоков (параллельных запросов) в каждом процессе')
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность замера, секунды')
+        parser.add_argument(
+            '--titles', type=int, default=500,
+            help='Число произведений в наборе данных')
+        parser.add_argument(
+            '--profile', choices=PROFILES + ('all',), default='all',
+            help='Профиль настроек базы и записи или все по очереди')
+        parser.add_argument(
+            '--output', help='Файл для результатов в формате JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда предназначена для SQLite.')
+        if connection.is_in_memory_db():
+            raise CommandError('Замеры на базе в памяти невозможны.')
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('Нужен запуск процессов через fork.')
+        if options['readers'] < 0 or options['writers'] < 0 or (
+                options['readers'] + options['writers'] == 0):
+            raise CommandError('Нужен хотя бы один процесс.')
+        if options['threads'] < 1:
+            raise CommandError('Нужен хотя бы один поток в процессе.')
+        self.options = options
+        profiles = (
+            PROFILES if options['profile'] == 'all'
+            else (options['profile'],))
+        results = [self.run_profile(profile) for profile in profiles]
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(results, output, ensure_ascii=False, indent=2)
+
+    def run_profile(self, profile):
+        settings_dict = connection.settings_dict
+        saved = {
+            key: settings_dict.get(key)
+            for key in ('PRAGMAS', 'TRANSACTION_MODE', 'TEST')
+        }
+        if profile == 'default':
+            settings_dict['PRAGMAS'] = {}
+            settings_dict['TRANSACTION_MODE'] = None
+        # Процессы работают с общей базой в файле; режим журнала
+        # сохраняется в файле, поэтому у каждого профиля своя база.
+        settings_dict['TEST'] = {
+            **(saved['TEST'] or {}),
+            'NAME': os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3'),
+        }
+        old_name = settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            # Версии и ответы тестовой базы не попадают в общие кэши.
+            with override_settings(
+                    CACHES=isolated_caches(tempfile.mkdtemp()),
+                    WRITE_QUEUE={
+                        **settings.WRITE_QUEUE,
+                        'ENABLED': profile == 'write-queue'}):
+                targets, tokens = self.prepare()
+                samples = self.run_workers(targets, tokens)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            settings_dict.update(saved)
+        return self.report(profile, journal_mode, samples)
+
+    def prepare(self):
+        titles = self.options['titles']
+        workers = ((self.options['readers'] + self.options['writers'])
+                   * self.options['threads'])
+        # Все отзывы набора данных пишет первый пользователь, остальные —
+        # участники замера без собственных отзывов.
+        generate(users=workers + 1, categories=1, genres=1, titles=titles,
+                 reviews=titles, comments=0)
+        call_command('recompute_ratings', stdout=open(os.devnull, 'w'))
+        targets = list(Review.objects.values_list('title_id', 'id'))
+        tokens = [
+            str(RoleAccessToken.for_user(user))
+            for user in User.objects.order_by('id')[1:]
+        ]
+        return targets, tokens
+
+    def run_workers(self, targets, tokens):
+        roles = (['writer'] * self.options['writers']
+                 + ['reader'] * self.options['readers'])
+        # Дочерние процессы открывают свои соединения.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        start_at = time.time() + 1
+        deadline = start_at + self.options['duration']
+        threads = self.options['threads']
+        with context.Pool(len(roles)) as pool:
+            return pool.starmap(run_process, [
+                (role, tokens[index * threads:(index + 1) * threads],
+                 targets, start_at, deadline, index)
+                for index, role in enumerate(roles)
+            ])
+
+    def report(self, profile, journal_mode, samples):
+        duration = self.options['duration']
+        result = {
+            'profile': profile,
+            'journal_mode': journal_mode,
+            'readers': self.options['readers'],
+            'writers': self.options['writers'],
+            'threads': self.options['threads'],
+            'duration': duration,
+        }
+        self.stdout.write(
+            f'{profile}: journal_mode={journal_mode}, '
+            f'{self.options["readers"]} readers, '
+            f'{self.options["writers"]} writers, '
+            f'{self.options["threads"]} threads each, {duration:g} s')
+        for role in ('reader', 'writer'):
+            role_samples = [
+                sample for sample in samples if sample['role'] == role]
+            latencies = [
+                value for sample in role_samples
+                for value in sample['latencies']]
+            statuses = {}
+            for sample in role_samples:
+                for code, number in sample['statuses'].items():
+                    statuses[str(code)] = statuses.get(str(code), 0) + number
+            errors = sum(
+                number for code, number in statuses.items()
+                if int(code) >= 500)
+            result[role] = {
+                'requests': len(latencies),
+                'requests_per_sec': round(len(latencies) / duration, 1),
+                'latency': summarize(latencies),
+                'status_codes': statuses,
+                'errors': errors,
+                'write_statements': summarize([
+                    value for sample in role_samples
+                    for value in sample['write_ms']]),
+                'locked': sum(sample['locked'] for sample in role_samples),
+                'queue_operations': sum(
+                    sample['queue_operations'] for sample in role_samples),
+                'queue_batches': sum(
+                    sample['queue_batches'] for sample in role_samples),
+            }
+            if not latencies:
+                continue
+            stats = result[role]
+            latency = stats['latency']
+            self.stdout.write(
+                f'  {role}s: {stats["requests_per_sec"]} req/s, '
+                f'p50 {latency["p50_ms"]} ms, p95 {latency["p95_ms"]} ms, '
+                f'p99 {latency["p99_ms"]} ms, errors {errors}, '
+                f'database is locked {stats["locked"]}')
+            if stats['write_statements']:
+                writes = stats['write_statements']
+                self.stdout.write(
+                    f'    write statements (incl. lock wait): '
+                    f'p50 {writes["p50_ms"]} ms, p95 {writes["p95_ms"]} ms, '
+                    f'p99 {writes["p99_ms"]} ms, max {writes["max_ms"]} ms')
+            if stats['queue_batches']:
+                self.stdout.write(
+                    f'    write queue: {stats["queue_operations"]} '
+                    f'operations in {stats["queue_batches"]} transactions')
+        return result
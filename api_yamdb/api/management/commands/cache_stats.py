@@ -0,0 +1,21 @@
+from django.core.management import BaseCommand
+
+from api.cache import get_cache_stats
+from api.throttling import AUTH_THROTTLES, get_throttle_stats
+
+
+class Command(BaseCommand):
+    help = 'Show API response cache hit/miss and throttling counters'
+
+    def handle(self, *args, **kwargs):
+        stats = get_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'hits: {stats["hits"]}, misses: {stats["misses"]}, '
+            f'hit rate: {ratio:.1%}')
+        scopes = [throttle.scope for throttle in AUTH_THROTTLES]
+        for scope, counters in get_throttle_stats(*scopes).items():
+            self.stdout.write(
+                f'{scope}: allowed: {counters["allowed"]}, '
+                f'rejected: {counters["rejected"]}')
@@ -0,0 +1,132 @@
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+
+from api import views
+from reviews.models import Review, Title
+
+# Представление, действие, параметры URL и строки запроса.
+CASES = (
+    (views.TitleViewSet, 'list', {}, {}),
+    (views.TitleViewSet, 'list', {}, {'genre': 'drama'}),
+    (views.TitleViewSet, 'list', {}, {'genre': 'drama,comedy',
+                                      'genre_match': 'all'}),
+    (views.TitleViewSet, 'list', {}, {'genre_prefix': 'dra'}),
+    (views.TitleViewSet, 'list', {}, {'category': 'films',
+                                      'year_min': 2000}),
+    (views.TitleViewSet, 'list', {}, {'name_prefix': 'Гам'}),
+    (views.TitleViewSet, 'retrieve', {'pk': 1}, {}),
+    (views.ReviewViewSet, 'list', {'title_id': 1}, {}),
+    (views.ReviewViewSet, 'retrieve', {'title_id': 1, 'pk': 1}, {}),
+    (views.CommentViewSet, 'list', {'title_id': 1, 'review_id': 1}, {}),
+    (views.CommentViewSet, 'retrieve',
+     {'title_id': 1, 'review_id': 1, 'pk': 1}, {}),
+    (views.CategoryViewSet, 'list', {}, {}),
+    (views.GenreViewSet, 'list', {}, {}),
+    (views.UserViewSet, 'list', {}, {}),
+    (views.UserViewSet, 'retrieve', {'username': 'admin'}, {}),
+)
+# Поиск подстроки (SearchFilter, LIKE '%q%') индекс не ускоряет; для
+# текстового поиска есть /api/v1/search/. Планы этих запросов выводятся,
+# но полное чтение в них не считается ошибкой.
+SUBSTRING_SEARCH_CASES = (
+    (views.CategoryViewSet, 'list', {}, {'search': 'Фильм'}),
+    (views.GenreViewSet, 'list', {}, {'search': 'Драма'}),
+    (views.UserViewSet, 'list', {}, {'search': 'admin'}),
+)
+
+
+def get_queryset(viewset, action, kwargs, params):
+    """Запрос, который представление выполнит для страницы или объекта."""
+    view = viewset()
+    view.action = action
+    view.action_map = {'get': action}
+    view.args = ()
+    view.kwargs = kwargs
+    view.format_kwarg = None
+    view.request = view.initialize_request(
+        APIRequestFactory().get('/', params))
+    # Родительские объекты вложенных маршрутов: план запроса от их
+    # наличия в базе не зависит.
+    view._parent_title = Title(pk=kwargs.get('title_id'))
+    view._parent_review = Review(
+        pk=kwargs.get('review_id'), title_id=kwargs.get('title_id'))
+    queryset = view.filter_queryset(view.get_queryset())
+    if action == 'retrieve':
+        lookup = view.lookup_url_kwarg or view.lookup_field
+        return queryset.filter(**{view.lookup_field: kwargs[lookup]})
+    return queryset[:api_settings.PAGE_SIZE]
+
+
+def full_scans(plan):
+    """Строки плана, читающие таблицу целиком."""
+    if connection.vendor == 'postgresql':
+        return [line for line in plan.splitlines() if 'Seq Scan' in line]
+    return [
+        line for line in plan.splitlines()
+        if 'SCAN' in line and 'INDEX' not in line
+        and 'CONSTANT ROW' not in line
+    ]
+
+
+def scanned_table(line):
+    words = line.replace('Seq Scan on', 'SCAN').split('SCAN', 1)[1].split()
+    return words[0] if words else None
+
+
+class Command(BaseCommand):
+    help = ('Explain the queries of API viewsets and fail if any of them '
+            'reads a whole table')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(
+                f'Разбор планов для {connection.vendor} не поддерживается.')
+        failed = []
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # На маленьких таблицах планировщик выбирает Seq Scan даже
+                # при подходящем индексе; без него Seq Scan значит, что
+                # индекса нет.
+                cursor.execute('SET enable_seqscan = off')
+            for case in CASES + SUBSTRING_SEARCH_CASES:
+                queryset = get_queryset(*case)
+                plan = queryset.explain()
+                scans = self.allowed(queryset, full_scans(plan))
+                viewset, action, _, params = case
+                name = f'{viewset.__name__}.{action} {params or ""}'.strip()
+                if not scans:
+                    self.stdout.write(f'ok   {name}')
+                elif case in SUBSTRING_SEARCH_CASES:
+                    self.stdout.write(self.style.WARNING(f'scan {name}'))
+                else:
+                    failed.append(name)
+                    self.stdout.write(self.style.ERROR(f'FAIL {name}'))
+                if scans or options['verbosity'] > 1:
+                    self.stdout.write(plan)
+            if connection.vendor == 'postgresql':
+                cursor.execute('RESET enable_seqscan')
+        if failed:
+            raise CommandError(
+                f'Полное чтение таблицы в запросах: {", ".join(failed)}')
+        self.stdout.write(self.style.SUCCESS('All queries use indexes'))
+
+    def allowed(self, queryset, scans):
+        """
+        Убирает чтение по порядку первичного ключа в списках без условий.
+
+        Страница такого списка читает с начала таблицы только LIMIT строк.
+        """
+        query = queryset.query
+        if query.where:
+            return scans
+        ordering = [
+            field.lstrip('-') for field in
+            query.order_by or queryset.model._meta.ordering
+        ]
+        if ordering not in ([], ['id'], ['pk']):
+            return scans
+        table = queryset.model._meta.db_table
+        return [line for line in scans if scanned_table(line) != table]
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import NotSupportedError
+
+from api.replica import sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = ('Copy the SQLite database to the read replica file, once or '
+            'periodically')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Скопировать базу один раз и завершиться')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между копированиями, секунды')
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASE_ALIAS:
+            raise CommandError(
+                'Реплика не настроена: задайте REPLICA_DATABASE_NAME.')
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    sync_sqlite_replica()
+                except NotSupportedError as error:
+                    raise CommandError(error)
+                self.stdout.write(
+                    f'Реплика обновлена за '
+                    f'{time.monotonic() - started:.3f} с')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
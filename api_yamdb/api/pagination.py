@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPagination(BasePagination):
+    """
+    Постраничный вывод по ключу сортировки (keyset).
+
+    Страница выбирается условием «строго после последней записи»
+    по полям `view.keyset_ordering`, поэтому нет ни COUNT(*), ни OFFSET,
+    и стоимость страницы не зависит от её глубины. Последнее поле
+    сортировки должно быть уникальным (обычно `id`).
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ('id',)
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.ordering))
+        self.fields = [
+            queryset.model._meta.get_field(name) for name in self.ordering]
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by(
+                *(f'-{name}' for name in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_keyset_filter(self, position, reverse):
+        """Условие «после позиции» для составного ключа сортировки."""
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            part = Q(**{f'{name}__{lookup}': position[index]})
+            for previous, value in zip(self.ordering, position[:index]):
+                part &= Q(**{previous: value})
+            condition |= part
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values = cursor['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)]
+            return position, bool(cursor.get('r'))
+        except (binascii.Error, KeyError, TypeError, ValueError,
+                ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        cursor = {
+            'p': [field.value_to_string(instance) for field in self.fields],
+            'r': int(reverse),
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(cursor, separators=(',', ':')).encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Постраничный вывод по номеру страницы с переключением на keyset.
+
+    Наличие параметра `?cursor=` (в том числе пустого — первая страница)
+    включает `KeysetPagination` для текущего запроса.
+    """
+    keyset_class = KeysetPagination
+    page_size_query_param = KeysetPagination.page_size_query_param
+    max_page_size = KeysetPagination.max_page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
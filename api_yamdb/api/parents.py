@@ -0,0 +1,37 @@
+from django.shortcuts import get_object_or_404
+
+from reviews.models import Review, Title
+
+
+class TitleParentMixin:
+    """
+    Произведение из URL вложенного маршрута.
+
+    Загружается один раз за запрос (представление создаётся на каждый
+    запрос) и доступно сериализаторам и разрешениям через `view`.
+    """
+
+    def get_title(self):
+        if not hasattr(self, '_parent_title'):
+            self._parent_title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id'))
+        return self._parent_title
+
+
+class ReviewParentMixin(TitleParentMixin):
+    """
+    Отзыв и произведение из URL вложенного маршрута.
+
+    Цепочка произведение → отзыв загружается одним запросом с JOIN;
+    отзыв другого произведения даёт 404.
+    """
+
+    def get_review(self):
+        if not hasattr(self, '_parent_review'):
+            self._parent_review = get_object_or_404(
+                Review.objects.select_related('title'),
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+            self._parent_title = self._parent_review.title
+        return self._parent_review
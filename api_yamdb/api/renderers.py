@@ -0,0 +1,44 @@
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+
+class Fragments(list):
+    """Список готовых JSON-представлений объектов (bytes)."""
+
+    def render(self):
+        return b'[' + b','.join(self) + b']'
+
+
+class FragmentJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, вставляющий готовые фрагменты без сериализации.
+
+    `Fragments` может быть самим ответом или значением в словаре ответа
+    (`results` постраничного вывода). Конверт ответа рендерится обычным
+    образом с заглушкой вместо списка, затем заглушка заменяется
+    склеенными фрагментами.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, Fragments):
+            return data.render()
+        if not isinstance(data, dict) or not any(
+                isinstance(value, Fragments) for value in data.values()):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        envelope = {}
+        fragments = {}
+        for index, (key, value) in enumerate(data.items()):
+            if isinstance(value, Fragments):
+                # Управляющий символ экранируется в любом режиме JSON и
+                # не встречается в остальном ответе неэкранированным.
+                placeholder = f'\x00fragments:{index}\x00'
+                fragments[json.dumps(placeholder).encode()] = value.render()
+                value = placeholder
+            envelope[key] = value
+        content = super().render(
+            envelope, accepted_media_type, renderer_context)
+        for placeholder, rendered in fragments.items():
+            content = content.replace(placeholder, rendered)
+        return content
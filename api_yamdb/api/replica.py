@@ -0,0 +1,152 @@
+"""
+Чтение с реплики базы данных.
+
+Если задан `REPLICA_DATABASE_ALIAS`, действия `replica_actions`
+представлений с `ReplicaReadMixin` читают с реплики, остальные запросы
+идут в `default`. Пользователь, изменивший данные, в течение
+`REPLICA_STICKY_SECONDS` читает из `default` и видит свои изменения,
+даже если реплика ещё не догнала основную базу.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import (iscoroutinefunction, markcoroutinefunction,
+                          sync_to_async)
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections
+
+from .cache import bump_versions, get_shared_cache
+
+# Версия кэша, которая сдвигается после обновления реплики.
+REPLICA_VERSION = 'replica'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def reading_from_replica():
+    return bool(settings.REPLICA_DATABASE_ALIAS) and _replica_reads.get()
+
+
+def sticky_key(user_id):
+    return f'replica:sticky:{user_id}'
+
+
+def is_sticky(user):
+    return (user.is_authenticated
+            and get_shared_cache().get(sticky_key(user.pk)) is not None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        # Кэш в базе данных (бэкенд db) читается только из основной базы.
+        if (reading_from_replica()
+                and model._meta.app_label != 'django_cache'):
+            return settings.REPLICA_DATABASE_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Объект, прочитанный с реплики, сохраняется в основную базу.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплика — копия основной базы вместе с её схемой.
+        return db != settings.REPLICA_DATABASE_ALIAS
+
+
+class ReplicaReadMixin:
+    """Чтение с реплики в действиях `replica_actions`."""
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (settings.REPLICA_DATABASE_ALIAS
+                and self.action in self.replica_actions
+                and not is_sticky(request.user)):
+            self._replica_token = _replica_reads.set(True)
+
+    def get_cache_version_names(self):
+        names = super().get_cache_version_names()
+        if reading_from_replica():
+            return names + (REPLICA_VERSION,)
+        return names
+
+    def get_fragment_shared_version_names(self):
+        names = super().get_fragment_shared_version_names()
+        if reading_from_replica():
+            return tuple(names) + (REPLICA_VERSION,)
+        return names
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                _replica_reads.reset(self._replica_token)
+
+
+class ReplicaStickinessMiddleware:
+    """Закрепляет за основной базой пользователя после записи."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        if self.is_write(request, response):
+            self.mark_sticky(request)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if self.is_write(request, response):
+            await sync_to_async(self.mark_sticky)(request)
+        return response
+
+    @staticmethod
+    def is_write(request, response):
+        return (settings.REPLICA_DATABASE_ALIAS
+                and request.method not in SAFE_METHODS
+                and response.status_code < 400)
+
+    @staticmethod
+    def mark_sticky(request):
+        # Проверка пользователя может обращаться к базе.
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            # Отметку видят все процессы: следующий запрос пользователя
+            # может попасть в другой.
+            get_shared_cache().set(sticky_key(user.pk), True,
+                                   settings.REPLICA_STICKY_SECONDS)
+
+
+def sync_sqlite_replica(source=DEFAULT_DB_ALIAS, replica=None):
+    """
+    Копирует основную базу SQLite в файл реплики через backup API.
+
+    Копирование идёт постранично под обычными блокировками SQLite, поэтому
+    чтение с реплики во время обновления не прерывается.
+    """
+    replica = replica or settings.REPLICA_DATABASE_ALIAS
+    source_connection = connections[source]
+    replica_connection = connections[replica]
+    for connection in (source_connection, replica_connection):
+        if connection.vendor != 'sqlite':
+            raise NotSupportedError(
+                'Копирование реплики поддерживается только для SQLite.')
+        connection.ensure_connection()
+    source_connection.connection.backup(replica_connection.connection)
+    # Ответы в кэше, прочитанные с прежней копии, устаревают.
+    bump_versions(REPLICA_VERSION)
@@ -1,9 +1,6 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
-
 from reviews.models import Category, Comment, Genre, Review, Title, User
 from reviews.validators import (validate_username,
                                 validate_username_bad_sign)
@@ -105,11 +102,6 @@ class TitleSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'rating',
                   'description', 'genre', 'category')
 
-    def to_representation(self, instance):
-        instance.rating = instance.reviews.aggregate(Avg('score'))['score__avg'
-                                                                   ]
-        return super().to_representation(instance)
-
 
 class TitleWriteSerializer(serializers.ModelSerializer):
     """Сериализотор для записа/изменения данных о произведениях."""
@@ -161,8 +153,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         """Проверка дубликатов оценки."""
         request = self.context['request']
         author = request.user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
+        # Произведение уже загружено представлением для этого запроса.
+        title = self.context['view'].get_title()
         if (
             request.method == 'POST'
             and Review.objects.filter(title=title, author=author).exists()
@@ -177,6 +169,29 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ('pub_date',)
 
 
+class ReviewBatchItemSerializer(serializers.ModelSerializer):
+    """Сериализатор отзыва в пакетной загрузке.
+
+    Существование произведения и уникальность отзыва проверяются
+    для всего пакета сразу в представлении.
+    """
+    title = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = Review
+        fields = ('title', 'text', 'score')
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Сериализатор результата полнотекстового поиска."""
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title = serializers.IntegerField(source='title_id')
+    review = serializers.IntegerField(source='review_id', allow_null=True)
+    name = serializers.CharField(allow_null=True)
+    text = serializers.CharField()
+
+
 class GetTokenSerializer(serializers.Serializer):
     """Сериализатор для получения токена"""
     username = serializers.CharField(validators=[validate_username,
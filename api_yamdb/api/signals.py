@@ -0,0 +1,120 @@
+from django.db.models import F
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save)
+from django.dispatch import receiver
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.signals import reviews_bulk_created
+
+from .authentication import REVOKING_FIELDS, forget_user
+from .cache import bump_versions
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, instance, **kwargs):
+    # Категория встроена в ответы о произведениях.
+    bump_versions('categories', 'titles')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genres(sender, instance, **kwargs):
+    bump_versions('genres', 'titles')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    # Название произведения выводится в отзывах.
+    bump_versions('titles:list', f'titles:{instance.pk}',
+                  f'titles:{instance.pk}:name',
+                  f'reviews:title:{instance.pk}')
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def invalidate_title_genre(sender, instance, **kwargs):
+    bump_versions('titles:list', f'titles:{instance.title_id}')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    # Отзыв меняет рейтинг произведения, а его текст выводится
+    # в комментариях.
+    bump_versions('titles:list', f'titles:{instance.title_id}',
+                  f'reviews:title:{instance.title_id}',
+                  f'reviews:{instance.pk}',
+                  f'comments:review:{instance.pk}')
+
+
+@receiver(reviews_bulk_created, sender=Review)
+def invalidate_bulk_reviews(sender, title_ids, **kwargs):
+    bump_versions('titles:list', *(
+        name for title_id in title_ids
+        for name in (f'titles:{title_id}', f'reviews:title:{title_id}')
+    ))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    bump_versions(f'comments:review:{instance.review_id}',
+                  f'comments:{instance.pk}')
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    instance._cached_username = instance.__dict__.get('username')
+    instance._cached_access = {
+        name: instance.__dict__[name]
+        for name in REVOKING_FIELDS if name in instance.__dict__
+    }
+
+
+@receiver(post_save, sender=User)
+def invalidate_username(sender, instance, created, **kwargs):
+    # Имя автора выводится в отзывах и комментариях.
+    if not created and instance._cached_username != instance.username:
+        bump_versions('users')
+    instance._cached_username = instance.username
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_access_change(sender, instance, created, **kwargs):
+    # Имя, роль и права записаны в токене, поэтому после их изменения
+    # выданные токены больше не принимаются.
+    changed = not created and any(
+        instance.__dict__.get(name) != value
+        for name, value in instance._cached_access.items()
+    )
+    if changed:
+        User.objects.filter(pk=instance.pk).update(
+            token_version=F('token_version') + 1)
+        instance.refresh_from_db(fields=('token_version',))
+    instance._cached_access = {
+        name: instance.__dict__[name]
+        for name in REVOKING_FIELDS if name in instance.__dict__
+    }
+    forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        bump_versions('titles:list', f'titles:{instance.pk}')
+    elif pk_set is None:
+        # Очистка связей жанра: затронутые произведения неизвестны.
+        bump_versions('titles')
+    else:
+        bump_versions('titles:list', *(f'titles:{pk}' for pk in pk_set))
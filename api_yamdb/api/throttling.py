@@ -0,0 +1,113 @@
+import hashlib
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import counters, get_cache
+
+
+def get_throttle_stats(*scopes):
+    """Счётчики пропущенных и отклонённых запросов по областям."""
+    keys = [
+        f'throttle:{scope}:{result}'
+        for scope in scopes for result in ('allowed', 'rejected')
+    ]
+    counters.flush()
+    values = get_cache().get_many(keys)
+    return {
+        scope: {
+            result: values.get(f'throttle:{scope}:{result}', 0)
+            for result in ('allowed', 'rejected')
+        }
+        for scope in scopes
+    }
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+
+    Ставка `N/период` из `DEFAULT_THROTTLE_RATES` задаёт ёмкость корзины
+    N и скорость её пополнения N маркеров за период. Состояние корзины
+    хранится в кэше `THROTTLE_CACHE_ALIAS`, поэтому с файловым кэшем или
+    кэшем в базе лимит общий для всех процессов на хосте. Чтение и запись
+    состояния не атомарны: при одновременных запросах лимит может быть
+    превышен на число конкурирующих процессов.
+    """
+
+    @property
+    def THROTTLE_RATES(self):
+        # Настройки читаются при каждом запросе, а не при импорте.
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def get_value(self, request):
+        """Значение, по которому считается лимит, или None."""
+        raise NotImplementedError
+
+    def get_field(self, request, name):
+        data = request.data
+        if not hasattr(data, 'get'):
+            return None
+        return str(data.get(name, '')).strip().lower()
+
+    def get_cache_key(self, request, view):
+        value = self.get_value(request)
+        if not value:
+            return None
+        digest = hashlib.md5(value.encode()).hexdigest()
+        return f'throttle:{self.scope}:{digest}'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = self.timer()
+        tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+        tokens = min(
+            self.num_requests,
+            tokens + (now - updated) * self.num_requests / self.duration)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.tokens = tokens
+        self.cache.set(self.key, (tokens, now), self.duration)
+        counters.count(
+            f'throttle:{self.scope}:{"allowed" if allowed else "rejected"}')
+        return allowed
+
+    def wait(self):
+        """Время до появления следующего маркера, секунды."""
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+    def get_value(self, request):
+        return self.get_ident(request)
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    scope = 'auth_username'
+
+    def get_value(self, request):
+        return self.get_field(request, 'username')
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    scope = 'auth_email'
+
+    def get_value(self, request):
+        return self.get_field(request, 'email')
+
+
+AUTH_THROTTLES = (AuthIPThrottle, AuthUsernameThrottle, AuthEmailThrottle)
@@ -1,8 +1,10 @@
 from rest_framework.routers import DefaultRouter
 
+from django.conf import settings
 from django.urls import include, path
 
 from . import views
+from .async_views import with_async_reads
 
 router = DefaultRouter()
 router.register(
@@ -31,8 +33,15 @@ router.register('categories', views.CategoryViewSet,
 router.register('categories/<slug:slug>', views.CategoryViewSet,
                 basename='category-delete')
 
+router_urls = router.urls
+if settings.ASYNC_READS:
+    router_urls = with_async_reads(router_urls)
+
 urlpatterns = [
-    path('v1/', include(router.urls)),
+    path('v1/reviews/batch/', views.ReviewBatchView.as_view(),
+         name='reviews-batch'),
+    path('v1/search/', views.SearchView.as_view(), name='search'),
+    path('v1/', include(router_urls)),
     path('v1/auth/signup/', views.RegisterUserView.as_view(), name='register'),
     path('v1/auth/token/', views.GetTokenView.as_view(), name='get_token'),
 ]
@@ -6,19 +6,29 @@ from rest_framework.filters import SearchFilter
 from rest_framework import mixins
 from rest_framework import views
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from django.core.mail import send_mail
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.tokens import default_token_generator
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import Category, Genre, Review, Title, User
+from reviews.search import KINDS, SearchResults
+from reviews.signals import reviews_bulk_created
 
 from . import serializers
+from .authentication import RoleAccessToken
+from .cache import CachedListMixin, CachedRetrieveMixin, FragmentListMixin
+from .conditional import ConditionalGetMixin
+from .emails import send_confirmation_code
 from .filters import TitleFilter
+from .pagination import PageNumberOrKeysetPagination
+from .parents import ReviewParentMixin, TitleParentMixin
 from .permissions import (AdminModeratorAuthorPermissions, AdminOnly,
                           IsAdminUserOrReadOnly)
+from .replica import ReplicaReadMixin
+from .throttling import AUTH_THROTTLES
+from .writer import write
 from api_yamdb import settings
 
 
@@ -32,6 +42,7 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = 'username'
     serializer_class = serializers.UserSerializer
     http_method_names = ["get", "post", "patch", "delete", "head", "options"]
+    query_budget = {'list': 3, 'retrieve': 2, 'me': 4}
 
     # ↓функция для обращения пользователя к данным собственного аккаунта↓
 
@@ -40,6 +51,9 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer_class=serializers.UserSelfPatchSerializer)
     def me(self, request):
         user = self.request.user
+        if user.get_deferred_fields():
+            # Пользователь из токена содержит только роль и права.
+            user = get_object_or_404(User, pk=user.pk)
         if request.method == 'GET':
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -49,13 +63,38 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedListMixin,
+                   CachedRetrieveMixin, FragmentListMixin,
+                   viewsets.ModelViewSet):
     """Класс отвечающий за отображение произведений."""
-    queryset = Title.objects.all()
+    # Рейтинг хранится в самом произведении, а жанры и категория
+    # подгружаются пачкой, поэтому число запросов не зависит от страницы.
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre').order_by('id')
     permission_classes = (IsAdminUserOrReadOnly,)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('id',)
+    cache_namespace = 'titles'
+    fragment_namespace = 'title'
+    # Переименование жанра или категории сдвигает версию titles.
+    fragment_version_names = ('titles',)
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('name', 'year', 'genre', 'category',)
     filterset_class = TitleFilter
+    query_budget = {'list': 4, 'retrieve': 3}
+
+    def get_validators(self):
+        # Версии сдвигаются сигналами, а число и max(id) из базы меняются
+        # и при записи в обход сигналов.
+        queryset = self.get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs.get('pk'))
+        return self.get_queryset_validators(
+            queryset, *self.get_cache_version_names(), last_field='pk')
+
+    def get_fragment_version_names(self, title):
+        # Сдвигается и отзывами произведения: они меняют рейтинг.
+        return (f'titles:{title.pk}',)
 
     def get_serializer_class(self):
         # Выбираем сериализатор в зависимости от запроса
@@ -65,22 +104,161 @@ class TitleViewSet(viewsets.ModelViewSet):
         return serializers.TitleWriteSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, TitleParentMixin, ConditionalGetMixin,
+                    FragmentListMixin, viewsets.ModelViewSet):
     """Класс отвечающий за отображение отзывов."""
     serializer_class = serializers.ReviewSerializer
     permission_classes = [AdminModeratorAuthorPermissions]
-
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('pub_date', 'id')
+    query_budget = {'list': 5, 'retrieve': 4, 'create': 8}
+    fragment_namespace = 'review'
+    # Имена авторов выводятся в отзывах.
+    fragment_version_names = ('users',)
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        # Произведение отзывов известно менеджеру связи и не загружается.
+        return self.get_title().reviews.select_related('author').order_by(
+            *self.keyset_ordering)
+
+    def get_validators(self):
+        queryset = self.get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs.get('pk'))
+        return self.get_queryset_validators(
+            queryset, 'users', f'reviews:title:{self.kwargs.get("title_id")}')
+
+    def get_fragment_version_names(self, review):
+        return (f'reviews:{review.pk}', f'titles:{review.title_id}:name')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        write(serializer.save, author=self.request.user,
+              title=self.get_title())
+
+
+class ReviewBatchView(views.APIView):
+    """
+    Пакетное создание отзывов текущего пользователя.
+
+    Принимает список объектов `{"title", "text", "score"}` и проверяет
+    существование произведений и дубликаты отзывов для всего пакета
+    несколькими запросами, а записывает отзывы одним bulk_create.
+    Для каждого элемента возвращается свой статус.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Ожидается список отзывов.')
+        if len(items) > settings.REVIEW_BATCH_MAX_SIZE:
+            raise ValidationError(
+                f'В пакете не больше {settings.REVIEW_BATCH_MAX_SIZE} '
+                f'отзывов.')
+
+        results = [None] * len(items)
+        valid = {}
+        for index, item in enumerate(items):
+            serializer = serializers.ReviewBatchItemSerializer(data=item)
+            if serializer.is_valid():
+                valid[index] = serializer.validated_data
+            else:
+                results[index] = self.error(index, serializer.errors)
+
+        title_ids = {data['title'] for data in valid.values()}
+        existing = set(Title.objects.filter(
+            pk__in=title_ids).values_list('pk', flat=True))
+        try:
+            with transaction.atomic():
+                created = self.create_reviews(
+                    request.user, valid, existing, results)
+        except IntegrityError:
+            # Параллельный запрос успел создать отзыв: проверяем заново.
+            with transaction.atomic():
+                created = self.create_reviews(
+                    request.user, valid, existing, results)
+
+        if created:
+            ids = dict(Review.objects.filter(
+                author=request.user, title_id__in=created.values()
+            ).values_list('title_id', 'id'))
+            for index, title_id in created.items():
+                results[index] = {
+                    'index': index,
+                    'status': status.HTTP_201_CREATED,
+                    'id': ids[title_id],
+                }
+            reviews_bulk_created.send(
+                sender=Review, title_ids=set(created.values()),
+                review_ids=list(ids.values()))
+
+        all_created = len(created) == len(items)
+        return Response(
+            results,
+            status=(status.HTTP_201_CREATED if all_created
+                    else status.HTTP_207_MULTI_STATUS))
+
+    @staticmethod
+    def error(index, errors):
+        return {
+            'index': index,
+            'status': status.HTTP_400_BAD_REQUEST,
+            'errors': errors,
+        }
+
+    def create_reviews(self, author, valid, existing, results):
+        """Записывает допустимые отзывы, возвращает {индекс: title_id}."""
+        taken = set(Review.objects.filter(
+            author=author, title_id__in=existing
+        ).values_list('title_id', flat=True))
+        created = {}
+        for index, data in valid.items():
+            title_id = data['title']
+            if title_id not in existing:
+                results[index] = self.error(
+                    index, {'title': ['Произведение не найдено.']})
+            elif title_id in taken:
+                results[index] = self.error(
+                    index,
+                    {'title': ['Может существовать только один отзыв!']})
+            else:
+                taken.add(title_id)
+                created[index] = title_id
+        Review.objects.bulk_create(
+            Review(author=author, title_id=created[index],
+                   text=valid[index]['text'], score=valid[index]['score'])
+            for index in created)
+        return created
+
+
+class SearchView(generics.ListAPIView):
+    """
+    Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+    Параметры: `q` — строка поиска, `type` — типы объектов через запятую.
+    """
+    permission_classes = (permissions.AllowAny,)
+    serializer_class = serializers.SearchResultSerializer
+    query_budget = 3
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Укажите строку поиска.'})
+        kinds = [
+            kind for kind in
+            self.request.query_params.get('type', '').split(',') if kind
+        ]
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise ValidationError({
+                'type': f'Допустимые типы: {", ".join(KINDS)}.'})
+        return SearchResults(query, kinds)
 
 
 class CategoryGenreListCreateDestroyViewSet(
+    ReplicaReadMixin,
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
@@ -93,24 +271,29 @@ class CategoryGenreListCreateDestroyViewSet(
     permission_classes = [IsAdminUserOrReadOnly]
     filter_backends = (SearchFilter,)
     search_fields = ('name',)
+    query_budget = {'list': 3, 'create': 3}
 
 
 class CategoryViewSet(CategoryGenreListCreateDestroyViewSet):
     """Представление для категорий"""
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    cache_namespace = 'categories'
 
 
 class GenreViewSet(CategoryGenreListCreateDestroyViewSet):
     """Представление для жанров"""
     queryset = Genre.objects.all()
     serializer_class = serializers.GenreSerializer
+    cache_namespace = 'genres'
 
 
 class GetTokenView(views.APIView):
     """Получение токена"""
     permission_classes = [permissions.AllowAny]
+    throttle_classes = AUTH_THROTTLES
     serializer_class = serializers.GetTokenSerializer
+    query_budget = 1
 
     def post(self, request, *args, **kwargs):
         try:
@@ -124,7 +307,7 @@ class GetTokenView(views.APIView):
                     user, serializer.validated_data['confirmation_code']):
                 raise ValidationError('Неверный код подтверждения.')
 
-            token = AccessToken().for_user(user)
+            token = RoleAccessToken.for_user(user)
             return Response({'token': str(token)})
         except (IntegrityError):
             return Response(status=status.HTTP_400_BAD_REQUEST)
@@ -135,47 +318,85 @@ class RegisterUserView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [permissions.AllowAny]
     serializer_class = serializers.SignUpSerializer
+    throttle_classes = AUTH_THROTTLES
+    query_budget = 4
 
     def create(self, request, *args, **kwargs):
         serializer = serializers.SignUpSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        user = self.get_or_create_user(**serializer.validated_data)
+        send_confirmation_code(user)
+        return Response({'email': user.email, 'username': user.username})
 
+    def find_user(self, username, email):
+        """
+        Ищет пользователя с теми же username и email одним запросом.
+
+        Возвращает найденного пользователя и поля, занятые другими.
+        """
+        user = None
+        conflicts = {}
+        for candidate in User.objects.filter(
+                Q(username=username) | Q(email=email)):
+            if candidate.username == username and candidate.email == email:
+                user = candidate
+                continue
+            for field, value in (('username', username), ('email', email)):
+                if getattr(candidate, field) == value:
+                    conflicts[field] = [
+                        f'Пользователь с {field}: {value} уже существует']
+        return user, conflicts
+
+    @staticmethod
+    def create_user(username, email):
+        with transaction.atomic():
+            return User.objects.create(username=username, email=email)
+
+    def get_or_create_user(self, username, email):
+        user, conflicts = self.find_user(username, email)
+        if conflicts:
+            raise ValidationError(conflicts)
+        if user is not None:
+            return user
         try:
-            user, _ = User.objects.get_or_create(**serializer.validated_data)
+            return write(self.create_user, username, email)
         except IntegrityError:
-            for value in ['username', 'email']:
-                if User.objects.filter(
-                    **{value: serializer.validated_data[value]}
-                ).exists():
-                    raise ValidationError(
-                        f'Пользователь с {value}: '
-                        f'{serializer.validated_data[value]} уже существует'
-                    )
-
-        confirmation_code = default_token_generator.make_token(user)
-        email_data = {
-            'subject': 'Добро пожаловать на наш сайт!',
-            'message': f'Ваш код подтверждения: {confirmation_code}',
-            'from_email': settings.TOKEN_EMAIL,
-            'recipient_list': [user.email], }
-
-        send_mail(**email_data)
-        return Response({'email': user.email, 'username': user.username})
+            # Одновременная регистрация заняла username или email.
+            user, conflicts = self.find_user(username, email)
+            if user is None or conflicts:
+                raise ValidationError(conflicts or (
+                    'Пользователь с такими данными уже существует'))
+            return user
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReplicaReadMixin, ReviewParentMixin,
+                     ConditionalGetMixin, FragmentListMixin,
+                     viewsets.ModelViewSet):
     """Отображение комментариев."""
     serializer_class = serializers.CommentSerializer
     permission_classes = (AdminModeratorAuthorPermissions,)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('pub_date', 'id')
+    query_budget = {'list': 5, 'retrieve': 4, 'create': 5}
+    fragment_namespace = 'comment'
+    fragment_version_names = ('users',)
 
     def get_queryset(self):
-        comments = Comment.objects.filter(
-            review_id=self.kwargs.get('review_id'))
-        return comments
+        return self.get_review().comment_set.select_related(
+            'author').order_by(*self.keyset_ordering)
+
+    def get_validators(self):
+        queryset = self.get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs.get('pk'))
+        return self.get_queryset_validators(
+            queryset, 'users',
+            f'comments:review:{self.kwargs.get("review_id")}')
+
+    def get_fragment_version_names(self, comment):
+        # Текст отзыва выводится в комментарии.
+        return (f'comments:{comment.pk}', f'reviews:{comment.review_id}')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get('review_id')
-        )
-        return serializer.save(author=self.request.user, review=review)
+        return write(serializer.save, author=self.request.user,
+                     review=self.get_review())
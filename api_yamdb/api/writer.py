@@ -0,0 +1,160 @@
+"""
+Очередь записи с групповой фиксацией (group commit).
+
+SQLite допускает одного писателя, и параллельные запросы на запись
+ждут блокировку друг за другом, каждый со своей фиксацией на диск. При
+`WRITE_QUEUE['ENABLED']` операции записи из представлений передаются
+потоку-писателю процесса: он собирает операции, пришедшие за
+`MAX_DELAY` секунд (не больше `MAX_BATCH`), и выполняет их в одной
+транзакции, каждую в своей точке сохранения. Результат или исключение
+операции возвращается ожидающему запросу после фиксации.
+
+Очередь работает внутри процесса: процессы по-прежнему конкурируют за
+блокировку, но каждый занимает её одним писателем. Запрос ждёт результат
+не дольше `TIMEOUT` секунд.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+
+
+class WriteQueueError(Exception):
+    """Операция записи не выполнена или её результат неизвестен."""
+
+
+def resolve(future, result=None, error=None):
+    # Операцию, ещё не начатую писателем, ожидающий мог отменить.
+    try:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+class GroupCommitWriter:
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        self.batches = 0
+        self.operations = 0
+
+    def submit(self, func, *args, **kwargs):
+        """Выполняет операцию в потоке-писателе и возвращает её результат."""
+        future = Future()
+        self.start()
+        self.queue.put((future, func, args, kwargs))
+        timeout = settings.WRITE_QUEUE['TIMEOUT']
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise WriteQueueError(
+                    f'Очередь записи не начала операцию за {timeout} с.'
+                ) from None
+        # Операция уже выполняется: её транзакция скоро завершится.
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise WriteQueueError(
+                f'Операция записи не завершилась за {2 * timeout} с.'
+            ) from None
+
+    def start(self):
+        # После fork поток-писатель остаётся только в родителе.
+        if self.pid == os.getpid() and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread.is_alive():
+                return
+            if self.pid not in (None, os.getpid()):
+                # Операции родителя после fork здесь не выполнятся, а
+                # при перезапуске потока поставленные в очередь остаются.
+                self.queue = queue.Queue()
+            self.thread = threading.Thread(
+                target=self.run, name='group-commit-writer', daemon=True)
+            self.pid = os.getpid()
+            self.thread.start()
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'operations': self.operations,
+            'mean_batch': (
+                round(self.operations / self.batches, 2)
+                if self.batches else 0),
+        }
+
+    def run(self):
+        while True:
+            self.process(self.collect(self.queue.get()))
+
+    def collect(self, first):
+        options = settings.WRITE_QUEUE
+        batch = [first]
+        deadline = time.monotonic() + options['MAX_DELAY']
+        while len(batch) < options['MAX_BATCH']:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self.queue.get(timeout=timeout) if timeout > 0
+                    else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def process(self, batch):
+        results = []
+        try:
+            with transaction.atomic():
+                for future, func, args, kwargs in batch:
+                    # Отменённая ожидающим операция не выполняется.
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(*args, **kwargs),
+                                            None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except BaseException as error:
+            # Фиксация не удалась или операция прервана не Exception
+            # (SystemExit и т. п.): ни одна операция не записана, а
+            # соединение могло стать непригодным. Ожидающие получают
+            # ошибку, поток-писатель продолжает работу.
+            connection.close()
+            if not isinstance(error, Exception):
+                error = WriteQueueError(
+                    f'Операция записи прервана: {error!r}')
+            for future, *_ in batch:
+                resolve(future, error=error)
+        else:
+            self.batches += 1
+            self.operations += len(results)
+            for future, result, error in results:
+                resolve(future, result, error)
+
+
+writer = GroupCommitWriter()
+
+
+def write(func, *args, **kwargs):
+    """
+    Выполняет операцию записи и возвращает её результат.
+
+    Без очереди и внутри уже открытой транзакции (её данные не видны
+    потоку-писателю) операция выполняется в текущем потоке.
+    """
+    if settings.WRITE_QUEUE['ENABLED'] and not connection.in_atomic_block:
+        return writer.submit(func, *args, **kwargs)
+    return func(*args, **kwargs)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# Под ASGI чтение списков и произведений не занимает общий поток.
+os.environ.setdefault('ASYNC_READS', 'True')
 
 application = get_asgi_application()
@@ -39,6 +39,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.budget.QueryBudgetMiddleware',
+    'api.replica.ReplicaStickinessMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -65,11 +67,37 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3')
+        'ENGINE': 'api_yamdb.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Выполняются при открытии каждого соединения. WAL позволяет
+        # читать во время записи; synchronous=NORMAL в режиме WAL не
+        # теряет целостность, только последние транзакции при сбое ОС.
+        'PRAGMAS': {
+            'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+            'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+            'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+            'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 ** 2)),
+            # Отрицательное значение — размер в КиБ
+            'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64000)),
+        },
+        'TRANSACTION_MODE': os.getenv('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
     }
 }
 
+# Реплика для чтения списков и объектов (api/replica.py). Для SQLite её
+# заменяет копия основной базы, которую обновляет команда sync_replica.
+REPLICA_DATABASE_NAME = os.getenv('REPLICA_DATABASE_NAME')
+REPLICA_DATABASE_ALIAS = 'replica' if REPLICA_DATABASE_NAME else None
+if REPLICA_DATABASE_ALIAS:
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, REPLICA_DATABASE_NAME),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['api.replica.ReplicaRouter']
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -106,16 +134,116 @@ AUTH_USER_MODEL = 'reviews.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # Списки произведений, отзывов и комментариев собираются из готовых
+    # JSON-фрагментов (api/cache.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FragmentJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Регистрация и получение токена: ёмкость корзины / период пополнения
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('AUTH_IP_RATE', '30/min'),
+        'auth_username': os.getenv('AUTH_USERNAME_RATE', '10/min'),
+        'auth_email': os.getenv('AUTH_EMAIL_RATE', '10/min'),
+    },
 }
 
+REVIEW_BATCH_MAX_SIZE = 1000
+
+# Конфигурация текстового поиска PostgreSQL для поискового индекса
+SEARCH_POSTGRES_CONFIG = 'russian'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Кэш ответов API: locmem по умолчанию, file или db (нужен createcachetable)
+API_CACHE_BACKEND = os.getenv('API_CACHE_BACKEND', 'locmem')
+API_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# Версии кэша, версии токенов и отметки чтения из основной базы должны
+# быть общими для всех процессов: file — для процессов одного хоста,
+# db — для нескольких хостов с общей базой (нужен createcachetable)
+API_SHARED_CACHE_BACKEND = os.getenv(
+    'API_SHARED_CACHE_BACKEND',
+    'file' if API_CACHE_BACKEND == 'locmem' else API_CACHE_BACKEND)
+API_SHARED_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    # Запись в FileBasedCache перечисляет весь каталог, поэтому
+    # используется его вариант с редким вытеснением
+    'file': {
+        'BACKEND': 'api.cache_backends.SharedFileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'shared_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'api_shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': API_CACHE_BACKENDS[API_CACHE_BACKEND],
+    'shared': API_SHARED_CACHE_BACKENDS[API_SHARED_CACHE_BACKEND],
+}
+API_CACHE_ALIAS = 'api'
+API_SHARED_CACHE_ALIAS = 'shared'
+API_CACHE_TIMEOUT = 300
+# Корзины ограничения частоты запросов; для общего лимита процессов
+# на хосте нужен кэш file или db
+THROTTLE_CACHE_ALIAS = API_CACHE_ALIAS
+# Версии токенов пользователей хранятся в общем кэше процессов
+TOKEN_VERSION_CACHE_TIMEOUT = 300
+# Кэш пользователей для JWT-аутентификации в памяти каждого процесса
+USER_CACHE = {
+    'MAX_SIZE': int(os.getenv('USER_CACHE_MAX_SIZE', 10000)),
+    'TTL': int(os.getenv('USER_CACHE_TTL', 60)),
+}
+# Запись отзывов, комментариев и регистраций через поток-писатель,
+# который фиксирует операции группами (api/writer.py)
+WRITE_QUEUE = {
+    'ENABLED': os.getenv('WRITE_QUEUE_ENABLED', '') == 'True',
+    'MAX_BATCH': int(os.getenv('WRITE_QUEUE_MAX_BATCH', 100)),
+    # Сколько секунд собирать операции в одну транзакцию
+    'MAX_DELAY': float(os.getenv('WRITE_QUEUE_MAX_DELAY', 0.002)),
+    # Сколько секунд запрос ждёт начала и завершения своей операции
+    'TIMEOUT': float(os.getenv('WRITE_QUEUE_TIMEOUT', 30)),
+}
+# Превышение бюджета SQL-запросов представления (атрибут query_budget):
+# off — не считать, log — предупреждение в лог, raise — исключение
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'log' if DEBUG else 'off')
+# Асинхронное чтение произведений, отзывов и комментариев
+# (api/async_views.py); asgi.py включает его по умолчанию
+ASYNC_READS = os.getenv('ASYNC_READS', '') == 'True'
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Письма регистрации ставятся в очередь и отправляются командой send_emails
+EMAIL_OUTBOX_ENABLED = os.getenv('EMAIL_OUTBOX_ENABLED', '') == 'True'
@@ -0,0 +1,25 @@
+"""
+SQLite с настройками соединения из `DATABASES`.
+
+`PRAGMAS` — словарь PRAGMA, выполняемых при открытии каждого соединения
+(включая соединения потоков и тестовую базу). `TRANSACTION_MODE` —
+режим `BEGIN` для `transaction.atomic()`: с `IMMEDIATE` транзакция сразу
+берёт блокировку записи и ждёт её в пределах `busy_timeout`. С режимом
+по умолчанию (DEFERRED) транзакция, начавшая с чтения, при попытке
+записи параллельно с другим писателем сразу получает
+`database is locked`: ожидание не помогает, снимок чтения уже устарел.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict.get('TRANSACTION_MODE')
+        self.cursor().execute(f'BEGIN {mode}' if mode else 'BEGIN')
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, OutboxEmail, Review, Title,
+                     User)
 
 
 @admin.register(Category)
@@ -41,6 +42,22 @@ class GenreAdmin(admin.ModelAdmin):
     emty_value_display = '-пусто-'
 
 
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    """Класс администратора для очереди писем."""
+    list_display = (
+        'recipient',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status',)
+    emty_value_display = '-пусто-'
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     """Класс администратора для Оценок."""
@@ -63,6 +80,7 @@ class TitleAdmin(admin.ModelAdmin):
         'year',
         'category',
         'description',
+        'rating',
     )
     search_fields = ('name',)
     list_filter = ('name',)
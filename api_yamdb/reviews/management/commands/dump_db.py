@@ -0,0 +1,98 @@
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from django.core.management import BaseCommand, CommandError
+
+from .load_db import models
+
+LINE_TERMINATORS = {'crlf': '\r\n', 'lf': '\n'}
+
+
+def format_value(value):
+    """Значение в том виде, в котором оно записано в static/data/*.csv."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc)
+        fraction = (
+            f'{value.microsecond // 1000:03d}'
+            if value.microsecond % 1000 == 0 else f'{value.microsecond:06d}'
+        )
+        return value.strftime('%Y-%m-%dT%H:%M:%S.') + fraction + 'Z'
+    return str(value)
+
+
+class Command(BaseCommand):
+    help = 'Dump data to csv files in the load_db layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', required=True,
+            help='Каталог, в который записываются файлы')
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'), default='csv',
+            help='csv (совместим с load_db) или JSON Lines')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать файлы (*.gz)')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Число строк, читаемых из базы за один раз')
+        parser.add_argument(
+            '--line-terminator', choices=tuple(LINE_TERMINATORS),
+            default='crlf', help='Разделитель строк CSV')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        os.makedirs(options['path'], exist_ok=True)
+        for model in models:
+            self.dump_model(model, options)
+        self.stdout.write(self.style.SUCCESS('Successfully dump data'))
+
+    def get_target(self, model, options):
+        name = model.base
+        if options['format'] == 'jsonl':
+            name = f'{os.path.splitext(name)[0]}.jsonl'
+        if options['gzip']:
+            name = f'{name}.gz'
+        return os.path.join(options['path'], name)
+
+    def open_target(self, target, options):
+        if options['gzip']:
+            return gzip.open(target, 'wt', encoding='utf-8', newline='')
+        return open(target, 'w', encoding='utf-8', newline='')
+
+    def dump_model(self, model, options):
+        # iterator() читает строки пачками (на PostgreSQL — серверным
+        # курсором), поэтому память не растёт с размером таблицы.
+        rows = model.model.objects.order_by('pk').values_list(
+            *model.fields).iterator(chunk_size=options['chunk_size'])
+        target = self.get_target(model, options)
+        started = time.monotonic()
+        count = 0
+        with self.open_target(target, options) as output:
+            if options['format'] == 'jsonl':
+                for row in rows:
+                    output.write(json.dumps(
+                        dict(zip(model.fields, map(format_value, row))),
+                        ensure_ascii=False))
+                    output.write('\n')
+                    count += 1
+            else:
+                writer = csv.writer(
+                    output,
+                    lineterminator=LINE_TERMINATORS[
+                        options['line_terminator']])
+                writer.writerow(model.fields)
+                for row in rows:
+                    writer.writerow(map(format_value, row))
+                    count += 1
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{os.path.basename(target)}: {count} строк, {rate:.0f} строк/с')
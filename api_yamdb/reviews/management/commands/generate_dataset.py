@@ -0,0 +1,128 @@
+import random
+import time
+
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+WORDS = (
+    'дракон', 'река', 'рыцарь', 'город', 'зима', 'звезда', 'море', 'лес',
+    'песня', 'тайна', 'дорога', 'огонь', 'сад', 'ветер', 'остров', 'тень',
+)
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def next_ids(model, count):
+    """Идентификаторы после последнего существующего объекта."""
+    start = (model.objects.order_by('-id').values_list(
+        'id', flat=True).first() or 0) + 1
+    return range(start, start + count)
+
+
+def generate(users, categories, genres, titles, reviews, comments,
+             batch_size=1000, seed=0):
+    """
+    Заполняет базу синтетическими данными через bulk_create.
+
+    Отзывы распределяются по парам (произведение, автор) без повторов,
+    комментарии — по созданным отзывам. Возвращает число созданных строк
+    по моделям.
+    """
+    if reviews > users * titles:
+        raise CommandError(
+            'Отзывов не может быть больше, чем пар произведение-автор.')
+    if comments and not reviews:
+        raise CommandError('Для комментариев нужны отзывы.')
+    if titles and not categories:
+        raise CommandError('Для произведений нужны категории.')
+    rng = random.Random(seed)
+    created = {}
+
+    def create(model, objects):
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        created[model._meta.model_name] = len(objects)
+
+    with transaction.atomic():
+        # Идентификаторы задаются явно: bulk_create в SQLite их не
+        # возвращает, а они нужны для связей.
+        user_ids = next_ids(User, users)
+        create(User, [
+            User(id=pk, username=f'user{pk}', email=f'user{pk}@yamdb.fake',
+                 bio=sentence(rng, 5))
+            for pk in user_ids
+        ])
+        category_ids = next_ids(Category, categories)
+        create(Category, [
+            Category(id=pk, name=f'Категория {pk}', slug=f'category-{pk}')
+            for pk in category_ids
+        ])
+        genre_ids = next_ids(Genre, genres)
+        create(Genre, [
+            Genre(id=pk, name=f'Жанр {pk}', slug=f'genre-{pk}')
+            for pk in genre_ids
+        ])
+        title_ids = next_ids(Title, titles)
+        create(Title, [
+            Title(id=pk, name=f'{sentence(rng, 2)} {pk}',
+                  year=rng.randint(1900, 2023),
+                  category_id=rng.choice(category_ids),
+                  description=sentence(rng, 8))
+            for pk in title_ids
+        ])
+        create(GenreTitle, [
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id in title_ids
+            for genre_id in rng.sample(genre_ids, min(2, len(genre_ids)))
+        ])
+        review_ids = next_ids(Review, reviews)
+        create(Review, [
+            Review(id=pk, title_id=title_ids[index % titles],
+                   author_id=user_ids[index // titles],
+                   text=sentence(rng, 12), score=rng.randint(1, 10))
+            for index, pk in enumerate(review_ids)
+        ])
+        create(Comment, [
+            Comment(review_id=rng.choice(review_ids),
+                    author_id=rng.choice(user_ids), text=sentence(rng, 6))
+            for _ in range(comments)
+        ])
+    return created
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a synthetic dataset'
+
+    def add_arguments(self, parser):
+        for name, default in (('users', 100), ('categories', 10),
+                              ('genres', 20), ('titles', 1000),
+                              ('reviews', 10000), ('comments', 20000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Число объектов (по умолчанию {default})')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число строк в одном INSERT')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Начальное значение генератора случайных чисел')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        created = generate(
+            options['users'], options['categories'], options['genres'],
+            options['titles'], options['reviews'], options['comments'],
+            batch_size=options['batch_size'], seed=options['seed'])
+        elapsed = time.monotonic() - started
+        rows = sum(created.values())
+        self.stdout.write(
+            f'{rows} строк за {elapsed:.1f} с, '
+            f'{rows / elapsed if elapsed else 0:.0f} строк/с')
+        # bulk_create не вызывает сигналы
+        call_command('recompute_ratings', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Successfully generate data'))
@@ -1,8 +1,20 @@
 import csv
+import gzip
+import json
+import os
+import time
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
+from rest_framework.exceptions import ValidationError as APIValidationError
+
+import django
+from django.apps import apps
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import connections, transaction
 from django.db.utils import IntegrityError
 
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
@@ -26,29 +38,253 @@ genre_title = model_tuple('genre_title.csv', GenreTitle, [
     'id', 'title_id', 'genre_id'])
 models = (user, category, genre, title, genre_title, review, comment, )
 
+DEFAULT_PATH = os.path.join(settings.BASE_DIR, 'static', 'data')
+STATE_FILE = '.load_db_state.json'
+MAX_REPORTED_ERRORS = 20
+
+
+def dependencies(model):
+    """Файлы, на строки которых ссылаются внешние ключи модели."""
+    related = {
+        field.related_model for field in model.model._meta.concrete_fields
+        if field.is_relation and field.attname in model.fields
+    }
+    return [
+        other for other in models
+        if other is not model and other.model in related
+    ]
+
+
+def dependency_order(items):
+    """Порядок записи, при котором связанные строки уже загружены."""
+    ordered = []
+    pending = list(items)
+    while pending:
+        ready = [
+            item for item in pending
+            if all(parent in ordered for parent in dependencies(item))
+        ]
+        if not ready:
+            raise CommandError(
+                f'Циклическая зависимость между файлами: '
+                f'{[item.base for item in pending]}')
+        ordered.extend(ready)
+        pending = [item for item in pending if item not in ready]
+    return ordered
+
+
+def find_source(path, model):
+    """Путь к файлу модели: обычный CSV или сжатый `.csv.gz`."""
+    for name in (model.base, f'{model.base}.gz'):
+        source = os.path.join(path, name)
+        if os.path.isfile(source):
+            return source
+    raise CommandError(
+        f'Ошибка при импорте файла базы данных. '
+        f'Проверьте наличие файла {model.base} '
+        f'по адресу: {path}')
+
+
+def open_source(source):
+    if source.endswith('.gz'):
+        return gzip.open(source, 'rt', encoding='utf-8', newline='')
+    return open(source, 'r', encoding='utf-8', newline='')
+
+
+def read_rows(csv_file, model):
+    """Потоково читает строки файла, проверив заголовок."""
+    reader = csv.DictReader(csv_file)
+    if reader.fieldnames != model.fields:
+        raise CommandError(
+            f'Проверьте поля в файле {model.base}'
+            f', требуемые поля: {model.fields}')
+    return reader
+
+
+def init_worker():
+    # При запуске процессов через spawn Django нужно настроить заново.
+    if not apps.ready:
+        django.setup()
+
+
+def parse_file(source, index):
+    """
+    Читает и проверяет файл в отдельном процессе.
+
+    Внешние ключи только приводятся к типу: связанные строки проверит
+    база при записи, когда файлы-родители уже будут загружены.
+    Возвращает строки кортежами и список ошибок.
+    """
+    model = models[index]
+    fields = [model.model._meta.get_field(name) for name in model.fields]
+    rows = []
+    errors = []
+    with open_source(source) as csv_file:
+        for line, data in enumerate(read_rows(csv_file, model), start=2):
+            try:
+                rows.append(tuple(
+                    field.target_field.to_python(data[name])
+                    if field.is_relation else field.clean(data[name], None)
+                    for name, field in zip(model.fields, fields)
+                ))
+            except (ValidationError, APIValidationError) as error:
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f'{model.base}, строка {line}: {error}')
+    return rows, errors
+
 
 class Command(BaseCommand):
     help = 'Load data from csv files'
 
-    def handle(self, *args, **kwargs):
-        for model in models:
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DEFAULT_PATH,
+            help='Каталог с файлами *.csv или *.csv.gz')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число строк в одной транзакции')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней сохранённой пачки')
+        parser.add_argument(
+            '--state-file',
+            help=f'Файл прогресса (по умолчанию <path>/{STATE_FILE})')
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать строки, нарушающие ограничения базы')
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Разбирать и проверять файлы в N процессах; файлы '
+                 'целиком держатся в памяти, запись идёт в порядке '
+                 'зависимостей внешних ключей')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        self.batch_size = options['batch_size']
+        if self.batch_size <= 0:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        self.ignore_conflicts = options['ignore_conflicts']
+        self.resume = options['resume']
+        self.state_file = options['state_file'] or os.path.join(
+            path, STATE_FILE)
+        self.state = self.read_state() if options['resume'] else {}
+
+        sources = [(model, find_source(path, model)) for model in models]
+        if options['workers'] > 1:
+            self.load_parallel(sources, options['workers'])
+        else:
+            for model, source in sources:
+                self.load_model(model, source)
+
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        # bulk_create не вызывает сигналы, поэтому рейтинги и поисковый
+        # индекс пересчитываются
+        call_command('recompute_ratings', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Successfully load data'))
+
+    def read_state(self):
+        try:
+            with open(self.state_file, encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self):
+        # Запись через временный файл, чтобы прогресс не повредился
+        # при прерывании.
+        temp_file = f'{self.state_file}.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as state_file:
+            json.dump(self.state, state_file)
+        os.replace(temp_file, self.state_file)
+
+    def load_model(self, model, source):
+        progress = self.state.setdefault(
+            model.base, {'rows': 0, 'done': False})
+        if progress['done']:
+            self.stdout.write(f'{model.base}: уже загружен, пропуск')
+            return
+        with open_source(source) as csv_file:
+            rows = read_rows(csv_file, model)
+            # Уже сохранённые строки только читаются, без создания объектов.
+            for _ in islice(rows, progress['rows']):
+                pass
+            self.write_batches(model, rows, progress)
+        progress['done'] = True
+        self.save_state()
+
+    def load_parallel(self, sources, workers):
+        order = dependency_order([model for model, _ in sources])
+        pending = [
+            (model, source) for model, source in sources
+            if not self.state.get(model.base, {}).get('done')
+        ]
+        # Соединения с базой не должны наследоваться процессами.
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+            futures = {
+                model.base: pool.submit(
+                    parse_file, source, models.index(model))
+                for model, source in pending
+            }
+            for model in order:
+                progress = self.state.setdefault(
+                    model.base, {'rows': 0, 'done': False})
+                if progress['done']:
+                    self.stdout.write(f'{model.base}: уже загружен, пропуск')
+                    continue
+                rows, errors = futures[model.base].result()
+                if errors:
+                    raise CommandError('\n'.join(errors))
+                self.write_batches(
+                    model,
+                    (dict(zip(model.fields, row))
+                     for row in rows[progress['rows']:]),
+                    progress)
+                progress['done'] = True
+                self.save_state()
+
+    def write_batches(self, model, rows, progress):
+        started = time.monotonic()
+        loaded = 0
+        # Прогресс сохраняется после фиксации пачки: при сбое между ними
+        # следующая после сохранённого прогресса пачка уже записана.
+        check_saved = self.resume
+        while True:
+            batch = [model.model(**data)
+                     for data in islice(rows, self.batch_size)]
+            if not batch:
+                break
+            size = len(batch)
+            if check_saved:
+                batch = self.without_saved(model, batch)
+                check_saved = False
             try:
-                with open(
-                    f'{settings.BASE_DIR}/static/data/{model.base}',
-                    'r', encoding='utf-8'
-                ) as csv_file:
-                    reader = csv.DictReader(csv_file)
-                    if reader.fieldnames != model.fields:
-                        raise BaseException(
-                            f'Проверьте поля в файле {model.base}'
-                            f', требуемые поля: {model.fields}')
+                with transaction.atomic():
                     model.model.objects.bulk_create(
-                        model.model(**data) for data in reader)
-            except IntegrityError:
-                pass
-            except FileNotFoundError:
-                raise BaseException(
-                    f'Ошибка при импорте файла базы данных. '
-                    f'Проверьте наличие файла {model.base} '
-                    f'по адресу: {settings.BASE_DIR}/static/data/')
-        self.stdout.write(self.style.SUCCESS('Successfully load data'))
+                        batch, batch_size=self.batch_size,
+                        ignore_conflicts=self.ignore_conflicts)
+            except IntegrityError as error:
+                raise CommandError(
+                    f'{model.base}: ошибка в строках '
+                    f'{progress["rows"] + 1}-{progress["rows"] + size}'
+                    f': {error}. Исправьте данные и запустите команду '
+                    f'с --resume.')
+            loaded += size
+            progress['rows'] += size
+            self.save_state()
+            elapsed = time.monotonic() - started
+            rate = loaded / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{model.base}: {progress["rows"]} строк, '
+                f'{rate:.0f} строк/с')
+
+    @staticmethod
+    def without_saved(model, batch):
+        """Строки пачки, которых ещё нет в базе."""
+        # Значения из CSV — строки, из базы — значения поля.
+        to_python = model.model._meta.pk.to_python
+        saved = set(model.model.objects.filter(
+            pk__in=[obj.pk for obj in batch]).values_list('pk', flat=True))
+        return [obj for obj in batch if to_python(obj.pk) not in saved]
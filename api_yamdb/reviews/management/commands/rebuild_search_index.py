@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from reviews import search
+from reviews.models import Comment, Review, Title
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Число строк индекса, записываемых за раз')
+
+    def handle(self, *args, **options):
+        total = search.rebuild(
+            Title, Review, Comment, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully index {total} objects'))
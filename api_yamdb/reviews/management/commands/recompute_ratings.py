@@ -0,0 +1,12 @@
+from django.core.management import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored title ratings from reviews'
+
+    def handle(self, *args, **kwargs):
+        updated = Title.objects.recompute_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully recompute {updated} ratings'))
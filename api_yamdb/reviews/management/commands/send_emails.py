@@ -0,0 +1,105 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import OutboxEmail, OutboxStatus
+
+# На это время письма пачки закрепляются за обработчиком: другие
+# обработчики их не возьмут, а после сбоя письма снова станут доступны.
+LEASE = timedelta(minutes=5)
+
+
+def claim_batch(size):
+    """Забирает пачку писем, время отправки которых наступило."""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxStatus.PENDING, next_attempt_at__lte=now,
+            ).order_by('next_attempt_at', 'id')[:size]
+        )
+        OutboxEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=now + LEASE)
+    return emails
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Число писем, отправляемых через одно соединение')
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить накопившиеся письма и завершиться')
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между проверками пустой очереди, секунды')
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='Число попыток, после которого письмо не отправляется')
+        parser.add_argument(
+            '--backoff', type=float, default=30,
+            help='Задержка перед второй попыткой, секунды; '
+                 'удваивается с каждой следующей')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('Размер пачки должен быть больше нуля.')
+        self.max_attempts = options['max_attempts']
+        self.backoff = options['backoff']
+        try:
+            while True:
+                emails = claim_batch(options['batch_size'])
+                if emails:
+                    self.send_batch(emails)
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def send_batch(self, emails):
+        connection = get_connection()
+        sent = []
+        try:
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                self.fail(email, error)
+            return
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.message, email.from_email,
+                    [email.recipient], connection=connection)
+                try:
+                    message.send()
+                except Exception as error:
+                    self.fail(email, error)
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+        OutboxEmail.objects.filter(pk__in=sent).update(
+            status=OutboxStatus.SENT, sent_at=timezone.now(), last_error='')
+        failed = len(emails) - len(sent)
+        self.stdout.write(f'Отправлено писем: {len(sent)}, ошибок: {failed}')
+
+    def fail(self, email, error):
+        email.attempts += 1
+        email.last_error = f'{type(error).__name__}: {error}'
+        if email.attempts >= self.max_attempts:
+            email.status = OutboxStatus.FAILED
+        else:
+            delay = self.backoff * 2 ** (email.attempts - 1)
+            email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        email.save(update_fields=(
+            'attempts', 'last_error', 'status', 'next_attempt_at'))
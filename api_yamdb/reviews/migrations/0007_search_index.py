@@ -0,0 +1,36 @@
+from django.db import migrations
+
+from reviews import search
+
+
+def create_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in search.BACKENDS:
+        return
+    with connection.cursor() as cursor:
+        search.get_backend(connection).create(cursor)
+    search.rebuild(
+        apps.get_model('reviews', 'Title'),
+        apps.get_model('reviews', 'Review'),
+        apps.get_model('reviews', 'Comment'),
+        using=connection.alias,
+    )
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor not in search.BACKENDS:
+        return
+    with connection.cursor() as cursor:
+        search.get_backend(connection).drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_outbox_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='name',
+            field=models.CharField(db_index=True, max_length=256, verbose_name='Имя'),
+        ),
+    ]
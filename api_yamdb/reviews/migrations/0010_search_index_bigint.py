@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from reviews import search
+
+
+def widen_ids(apps, schema_editor):
+    # Первичные ключи моделей — bigint, индекс создавался с integer.
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'ALTER TABLE {search.TABLE} '
+            'ALTER COLUMN title_id TYPE bigint, '
+            'ALTER COLUMN review_id TYPE bigint')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(widen_ids, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,9 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .validators import (year_validator,
                          validate_username,
@@ -8,6 +11,8 @@ from .validators import (year_validator,
 
 MAX_CHAR_LENGTH = 150
 MAX_EMAIL_LENGTH = 254
+# Хранимый рейтинг произведения (см. TitleQuerySet).
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating')
 
 
 class Role(models.TextChoices):
@@ -61,6 +66,11 @@ class User(AbstractUser):
         blank=False,
         default='XXXX'
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
+    )
 
     @property
     def is_user(self):
@@ -74,6 +84,12 @@ class User(AbstractUser):
     def is_admin(self):
         return self.role == Role.ADMIN
 
+    def revoke_tokens(self):
+        """Делает недействительными все выданные пользователю токены."""
+        self.token_version = F('token_version') + 1
+        self.save(update_fields=('token_version',))
+        self.refresh_from_db(fields=('token_version',))
+
     class Meta:
         ordering = ('id',)
         verbose_name = 'Пользователь'
@@ -109,11 +125,57 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям с поддержкой хранимого рейтинга."""
+
+    def add_scores(self, score_sum, score_count):
+        """Сдвигает сумму и количество оценок, пересчитывая рейтинг.
+
+        Обновление выполняется одним UPDATE: правая часть вычисляется
+        по значениям до изменения, поэтому сдвиг учтён в обоих столбцах.
+        """
+        return self.update(
+            rating_sum=F('rating_sum') + score_sum,
+            rating_count=F('rating_count') + score_count,
+            rating=Case(
+                When(
+                    rating_count__gt=-score_count,
+                    then=(
+                        (F('rating_sum') + score_sum)
+                        / (F('rating_count') + score_count)
+                    ),
+                ),
+                default=None,
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def recompute_ratings(self):
+        """Пересчитывает рейтинг по всем отзывам массовым UPDATE."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0),
+        )
+        return self.update(rating=Case(
+            When(rating_count__gt=0,
+                 then=F('rating_sum') / F('rating_count')),
+            default=None,
+            output_field=models.IntegerField(),
+        ))
+
+
 class Title(models.Model):
     """
     Класс описывающий произведения.
     """
-    name = models.CharField(verbose_name='Имя', max_length=256)
+    name = models.CharField(verbose_name='Имя', max_length=256,
+                            db_index=True)
     year = models.PositiveSmallIntegerField(verbose_name='Год',
                                             validators=[year_validator]
                                             )
@@ -122,24 +184,70 @@ class Title(models.Model):
         verbose_name='Жанр',
         related_name='titles',
         through='GenreTitle')
+    # Индекс внешнего ключа покрывает составной индекс (category, year).
     category = models.ForeignKey(
-        Category, verbose_name='Категория', on_delete=models.CASCADE
+        Category, verbose_name='Категория', on_delete=models.CASCADE,
+        db_index=False
     )
     description = models.CharField(
         verbose_name='Описание', max_length=256, default="Без описания"
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок', default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок', default=0, editable=False
+    )
+    rating = models.IntegerField(
+        verbose_name='Рейтинг', null=True, blank=True, default=None,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=('category', 'year'),
+                         name='title_category_year_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Рейтинг меняют только отзывы UPDATE-ом по счётчикам: сохранение
+        # загруженного раньше произведения не перезаписывает его.
+        if (not self._state.adding and not args
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class GenreTitle(models.Model):
-    title = models.ForeignKey(Title, on_delete=models.CASCADE)
-    genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
+    # Отдельные индексы внешних ключей не нужны: их покрывают составные
+    # индексы (title, genre) и (genre, title).
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              db_index=False)
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE,
+                              db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'genre'),
+                name='unique genre title'
+            )]
+        indexes = [
+            models.Index(fields=('genre', 'title'),
+                         name='genretitle_genre_title_idx'),
+        ]
 
 
 class Review(models.Model):
@@ -147,9 +255,10 @@ class Review(models.Model):
     author = models.ForeignKey(
         User, verbose_name='Автор', on_delete=models.CASCADE
     )
+    # Индекс внешнего ключа покрывает составной индекс (title, pub_date).
     title = models.ForeignKey(
         Title, verbose_name='Название', on_delete=models.CASCADE,
-        related_name="reviews"
+        related_name="reviews", db_index=False
     )
     text = models.TextField('Текст')
     score = models.IntegerField(
@@ -157,8 +266,10 @@ class Review(models.Model):
         validators=(MinValueValidator(1),
                     MaxValueValidator(10)),
         error_messages={'validators': 'Оценка от 1 до 10!'})
-    pub_date = models.DateTimeField('Дата публикации', auto_now_add=True,
-                                    db_index=True)
+    # default вместо auto_now_add: bulk_create в load_db сохраняет
+    # дату из выгрузки, а не перезаписывает её текущим временем.
+    pub_date = models.DateTimeField('Дата публикации', default=timezone.now,
+                                    editable=False, db_index=True)
 
     class Meta:
         verbose_name = 'Рейтинг'
@@ -168,26 +279,79 @@ class Review(models.Model):
                 fields=('title', 'author', ),
                 name='unique review'
             )]
+        indexes = [
+            models.Index(fields=('title', 'pub_date'),
+                         name='review_title_pub_date_idx'),
+        ]
 
     def __str__(self):
         return str(self.title)
 
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется сигналом в той же транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Класс описывающий комментарии."""
     author = models.ForeignKey(
         User, verbose_name='Автор', on_delete=models.CASCADE
     )
+    # Индекс внешнего ключа покрывает составной индекс (review, pub_date).
     review = models.ForeignKey(
-        Review, verbose_name='Рейтинг', on_delete=models.CASCADE
+        Review, verbose_name='Рейтинг', on_delete=models.CASCADE,
+        db_index=False
     )
     text = models.TextField('Текст')
-    pub_date = models.DateTimeField('Дата публикации', auto_now_add=True,
-                                    db_index=True)
+    # default вместо auto_now_add: bulk_create в load_db сохраняет
+    # дату из выгрузки, а не перезаписывает её текущим временем.
+    pub_date = models.DateTimeField('Дата публикации', default=timezone.now,
+                                    editable=False, db_index=True)
 
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=('review', 'pub_date'),
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return str(self.text)
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = 'pending', 'ожидает отправки'
+    SENT = 'sent', 'отправлено'
+    FAILED = 'failed', 'не отправлено'
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку командой send_emails."""
+    subject = models.CharField('Тема', max_length=256)
+    message = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель', max_length=MAX_EMAIL_LENGTH)
+    recipient = models.EmailField('Получатель', max_length=MAX_EMAIL_LENGTH)
+    status = models.CharField(
+        'Статус', max_length=16, choices=OutboxStatus.choices,
+        default=OutboxStatus.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    created_at = models.DateTimeField('Создано', default=timezone.now)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=('status', 'next_attempt_at'),
+                         name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
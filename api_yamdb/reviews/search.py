@@ -0,0 +1,282 @@
+"""
+Полнотекстовый поиск по произведениям, отзывам и комментариям.
+
+Индекс — отдельная таблица `reviews_search`: виртуальная таблица FTS5
+в SQLite или таблица с колонкой tsvector и GIN-индексом в PostgreSQL.
+Строка индекса хранит тип объекта, ссылки на произведение и отзыв и
+индексируемый текст, поэтому результаты поиска выдаются без обращения
+к таблицам моделей. Индекс обновляется сигналами; после массовой
+загрузки его пересобирает команда `rebuild_search_index`.
+"""
+import re
+
+from django.conf import settings
+from django.db import NotSupportedError, connections
+
+TABLE = 'reviews_search'
+KINDS = ('title', 'review', 'comment')
+WORD = re.compile(r'\w+')
+
+
+def entry_id(kind, object_id):
+    """Ключ строки индекса: идентификатор объекта и код его типа."""
+    return object_id * 4 + KINDS.index(kind) + 1
+
+
+def title_entry(title):
+    return ('title', title.pk, title.pk, None, title.name,
+            title.description)
+
+
+def review_entry(review):
+    return ('review', review.pk, review.title_id, None, '', review.text)
+
+
+def comment_entry(comment):
+    return ('comment', comment.pk, comment.review.title_id,
+            comment.review_id, '', comment.text)
+
+
+class SQLiteSearchBackend:
+    """Индекс FTS5; ранжирование bm25, название весит больше текста."""
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+            'kind UNINDEXED, title_id UNINDEXED, review_id UNINDEXED, '
+            "name, body, tokenize = 'unicode61 remove_diacritics 2')")
+        # Веса колонок для rank: поиск с ORDER BY rank их использует.
+        cursor.execute(
+            f"INSERT INTO {TABLE}({TABLE}, rank) "
+            "VALUES ('rank', 'bm25(0, 0, 0, 10.0, 1.0)')")
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def delete(self, cursor, ids):
+        if not ids:
+            return
+        cursor.execute(
+            f'DELETE FROM {TABLE} WHERE rowid IN '
+            f'({", ".join(["%s"] * len(ids))})', ids)
+
+    def save(self, cursor, entries):
+        self.delete(cursor, [entry_id(*entry[:2]) for entry in entries])
+        cursor.executemany(
+            f'INSERT INTO {TABLE}'
+            '(rowid, kind, title_id, review_id, name, body) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            [(entry_id(*entry[:2]), entry[0]) + entry[2:]
+             for entry in entries])
+
+    def clear(self, cursor):
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+    def prepare(self, query):
+        words = WORD.findall(query)
+        if not words:
+            return None
+        # Каждое слово — строка в кавычках, чтобы ввод не разбирался как
+        # синтаксис FTS5; последнее слово ищется по префиксу.
+        return ' '.join(f'"{word}"' for word in words) + '*'
+
+    def where(self, kinds):
+        condition = f'{TABLE} MATCH %s'
+        if kinds:
+            condition += f' AND kind IN ({", ".join(["%s"] * len(kinds))})'
+        return condition
+
+    def count(self, cursor, query, kinds):
+        cursor.execute(
+            f'SELECT count(*) FROM {TABLE} WHERE {self.where(kinds)}',
+            [query, *kinds])
+        return cursor.fetchone()[0]
+
+    def search(self, cursor, query, kinds, limit, offset):
+        cursor.execute(
+            f'SELECT rowid, kind, title_id, review_id, name, body '
+            f'FROM {TABLE} WHERE {self.where(kinds)} '
+            f'ORDER BY rank LIMIT %s OFFSET %s',
+            [query, *kinds, -1 if limit is None else limit, offset])
+        return cursor.fetchall()
+
+
+class PostgresSearchBackend:
+    """Индекс tsvector с GIN; ранжирование ts_rank, название с весом A."""
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE {TABLE} ('
+            'id bigint PRIMARY KEY, kind varchar(16) NOT NULL, '
+            'title_id bigint NOT NULL, review_id bigint, '
+            'name text NOT NULL, body text NOT NULL, '
+            'document tsvector NOT NULL)')
+        cursor.execute(
+            f'CREATE INDEX {TABLE}_document ON {TABLE} USING GIN (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def delete(self, cursor, ids):
+        cursor.execute(f'DELETE FROM {TABLE} WHERE id = ANY(%s)', [ids])
+
+    def save(self, cursor, entries):
+        config = settings.SEARCH_POSTGRES_CONFIG
+        cursor.executemany(
+            f'INSERT INTO {TABLE} '
+            '(id, kind, title_id, review_id, name, body, document) '
+            'VALUES (%s, %s, %s, %s, %s, %s, '
+            "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, %s), 'B')) "
+            'ON CONFLICT (id) DO UPDATE SET '
+            'title_id = EXCLUDED.title_id, review_id = EXCLUDED.review_id, '
+            'name = EXCLUDED.name, body = EXCLUDED.body, '
+            'document = EXCLUDED.document',
+            [(entry_id(*entry[:2]), entry[0]) + entry[2:]
+             + (config, entry[4], config, entry[5])
+             for entry in entries])
+
+    def clear(self, cursor):
+        cursor.execute(f'TRUNCATE {TABLE}')
+
+    def prepare(self, query):
+        return query if WORD.search(query) else None
+
+    def where(self, kinds):
+        condition = 'document @@ query'
+        if kinds:
+            condition += ' AND kind = ANY(%s)'
+        return condition
+
+    def params(self, query, kinds):
+        return [settings.SEARCH_POSTGRES_CONFIG, query] + (
+            [list(kinds)] if kinds else [])
+
+    def count(self, cursor, query, kinds):
+        cursor.execute(
+            f'SELECT count(*) FROM {TABLE}, '
+            f'plainto_tsquery(%s::regconfig, %s) query '
+            f'WHERE {self.where(kinds)}',
+            self.params(query, kinds))
+        return cursor.fetchone()[0]
+
+    def search(self, cursor, query, kinds, limit, offset):
+        cursor.execute(
+            f'SELECT id, kind, title_id, review_id, name, body '
+            f'FROM {TABLE}, plainto_tsquery(%s::regconfig, %s) query '
+            f'WHERE {self.where(kinds)} '
+            f'ORDER BY ts_rank(document, query) DESC, id '
+            f'LIMIT %s OFFSET %s',
+            self.params(query, kinds) + [limit, offset])
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(connection):
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise NotSupportedError(
+            f'Полнотекстовый поиск не поддерживается для '
+            f'{connection.vendor}.')
+
+
+def save_entries(entries, using='default'):
+    """Добавляет или обновляет строки индекса; без индекса ничего не делает."""
+    connection = connections[using]
+    entries = list(entries)
+    if connection.vendor not in BACKENDS or not entries:
+        return
+    with connection.cursor() as cursor:
+        get_backend(connection).save(cursor, entries)
+
+
+def delete_entry(kind, object_id, using='default'):
+    connection = connections[using]
+    if connection.vendor not in BACKENDS:
+        return
+    with connection.cursor() as cursor:
+        get_backend(connection).delete(cursor, [entry_id(kind, object_id)])
+
+
+def rebuild(title_model, review_model, comment_model, using='default',
+            batch_size=1000):
+    """Заполняет индекс заново по всем объектам; возвращает их число."""
+    connection = connections[using]
+    backend = get_backend(connection)
+    sources = (
+        (title_model.objects.values_list('pk', 'name', 'description'),
+         lambda row: ('title', row[0], row[0], None, row[1], row[2])),
+        (review_model.objects.values_list('pk', 'title_id', 'text'),
+         lambda row: ('review', row[0], row[1], None, '', row[2])),
+        (comment_model.objects.values_list(
+            'pk', 'review__title_id', 'review_id', 'text'),
+         lambda row: ('comment',) + row[:3] + ('', row[3])),
+    )
+    total = 0
+    with connection.cursor() as cursor:
+        backend.clear(cursor)
+        for queryset, to_entry in sources:
+            batch = []
+            for row in queryset.using(using).order_by('pk').iterator(
+                    chunk_size=batch_size):
+                batch.append(to_entry(row))
+                if len(batch) == batch_size:
+                    backend.save(cursor, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                backend.save(cursor, batch)
+                total += len(batch)
+    return total
+
+
+class SearchResults:
+    """
+    Ленивый результат поиска для пагинатора.
+
+    Пагинатор вызывает `count()` и берёт срез: каждый из них выполняет
+    один запрос к индексу, причём в выборку попадает только страница.
+    """
+
+    def __init__(self, query, kinds=(), using='default'):
+        self.connection = connections[using]
+        self.backend = get_backend(self.connection)
+        self.query = self.backend.prepare(query)
+        self.kinds = tuple(kinds)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if self.query is None:
+                self._count = 0
+            else:
+                with self.connection.cursor() as cursor:
+                    self._count = self.backend.count(
+                        cursor, self.query, self.kinds)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('Поддерживаются только срезы без шага.')
+        start = item.start or 0
+        if self.query is None or item.stop is not None and item.stop <= start:
+            return []
+        limit = None if item.stop is None else item.stop - start
+        with self.connection.cursor() as cursor:
+            rows = self.backend.search(
+                cursor, self.query, self.kinds, limit, start)
+        return [
+            {'type': kind, 'id': (key - KINDS.index(kind) - 1) // 4,
+             'title_id': title_id, 'review_id': review_id,
+             'name': name or None, 'text': body}
+            for key, kind, title_id, review_id, name, body in rows
+        ]
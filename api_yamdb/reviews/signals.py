@@ -0,0 +1,82 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from . import search
+from .models import Comment, Review, Title
+
+# bulk_create не отправляет post_save: после массовой записи отзывов
+# отправляется этот сигнал с идентификаторами затронутых произведений
+# (title_ids) и созданных отзывов (review_ids).
+reviews_bulk_created = Signal()
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """Запоминает загруженную оценку, чтобы считать сдвиг рейтинга."""
+    instance._rating_state = (
+        instance.__dict__.get('title_id'), instance.__dict__.get('score'))
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    """Переносит изменение оценки в хранимый рейтинг произведения."""
+    old_title_id, old_score = instance._rating_state
+    if created:
+        Title.objects.filter(pk=instance.title_id).add_scores(
+            instance.score, 1)
+    elif old_title_id is None or old_score is None:
+        # Отзыв загружен с отложенными полями: старая оценка неизвестна.
+        Title.objects.filter(pk=instance.title_id).recompute_ratings()
+    elif old_title_id != instance.title_id:
+        Title.objects.filter(pk=old_title_id).add_scores(-old_score, -1)
+        Title.objects.filter(pk=instance.title_id).add_scores(
+            instance.score, 1)
+    elif old_score != instance.score:
+        Title.objects.filter(pk=instance.title_id).add_scores(
+            instance.score - old_score, 0)
+    instance._rating_state = (instance.title_id, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Убирает оценку удалённого отзыва из рейтинга произведения."""
+    title_id, score = instance._rating_state
+    if title_id is None or score is None:
+        Title.objects.filter(pk=instance.title_id).recompute_ratings()
+    else:
+        Title.objects.filter(pk=title_id).add_scores(-score, -1)
+
+
+@receiver(reviews_bulk_created, sender=Review)
+def update_rating_on_bulk_create(sender, title_ids, **kwargs):
+    """Пересчитывает рейтинг произведений после массовой записи."""
+    Title.objects.filter(pk__in=title_ids).recompute_ratings()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def update_search_index(sender, instance, using, **kwargs):
+    """Переиндексирует сохранённый объект."""
+    to_entry = {
+        Title: search.title_entry,
+        Review: search.review_entry,
+        Comment: search.comment_entry,
+    }[sender]
+    search.save_entries([to_entry(instance)], using=using)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    search.delete_entry(
+        sender._meta.model_name, instance.pk, using=using)
+
+
+@receiver(reviews_bulk_created, sender=Review)
+def index_bulk_reviews(sender, review_ids=(), **kwargs):
+    search.save_entries(
+        ('review', pk, title_id, None, '', text)
+        for pk, title_id, text in Review.objects.filter(
+            pk__in=review_ids).values_list('pk', 'title_id', 'text'))
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def raise_on_query_budget(settings):
+    # Превышение бюджета запросов представления роняет любой тест.
+    settings.QUERY_BUDGET_MODE = 'raise'
@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import caches
+
+from api.authentication import user_cache
+from api.cache import counters, isolated_caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(settings, tmp_path):
+    # Файловые кэши тестов не пересекаются с кэшами рабочей базы.
+    settings.CACHES = isolated_caches(tmp_path / 'caches')
+    # База очищается между тестами без сигналов, поэтому кэш тоже.
+    for cache in caches.all():
+        cache.clear()
+    user_cache.clear()
+    counters.clear()
+    yield
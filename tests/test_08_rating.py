@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def get_rating(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, admin_client, user_client,
+                                       moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        create_single_review(admin_client, title_id, 'review 1', 10)
+        review = create_single_review(
+            user_client, title_id, 'review 2', 5).json()
+        assert self.get_rating(admin_client, title_id) == 7, (
+            'Проверьте, что хранимый рейтинг произведения обновляется при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{review["id"]}/', data={'score': 8})
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(admin_client, title_id) == 9, (
+            'Проверьте, что хранимый рейтинг произведения обновляется при '
+            'изменении оценки отзыва.'
+        )
+
+        create_single_review(moderator_client, title_id, 'review 3', 1)
+        response = user_client.delete(f'{url}{review["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что хранимый рейтинг произведения обновляется при '
+            'удалении отзыва.'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None, (
+            'Рейтинг произведения без отзывов должен быть `None`.'
+        )
+
+    def test_02_recompute_ratings(self, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'review 1', 3)
+        create_single_review(user_client, title_id, 'review 2', 6)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+        call_command('recompute_ratings')
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            9, 2, 4), (
+            'Проверьте, что команда `recompute_ratings` пересчитывает '
+            'сумму, количество оценок и рейтинг произведений.'
+        )
+
+    def test_03_stale_title_save_keeps_rating(self, admin_client,
+                                              user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        create_single_review(user_client, title_id, 'review 1', 8)
+        stale.name = 'Новое название'
+        stale.save()
+        title = Title.objects.get(pk=title_id)
+        assert title.name == 'Новое название'
+        assert (title.rating_sum, title.rating_count, title.rating) == (
+            8, 1, 8), (
+            'Проверьте, что сохранение произведения, загруженного до '
+            'создания отзыва, не перезаписывает его рейтинг.'
+        )
@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Genre, GenreTitle, Title
+from tests.utils import create_reviews
+
+
+def create_catalog(size):
+    category = Category.objects.create(name='Фильм', slug='films')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'genre-{idx}') for idx in range(3)
+    )
+    genres = list(Genre.objects.all())
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {idx}', year=2000, category=category)
+        for idx in range(size)
+    )
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre)
+        for title in Title.objects.all()
+        for genre in genres
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueriesAPI:
+
+    @pytest.mark.parametrize('size', (10, 100, 1000))
+    def test_01_titles_list_queries(self, client, size):
+        create_catalog(size)
+        url = '/api/v1/titles/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert response.json()['count'] == size
+        assert len(context.captured_queries) == 4, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет постоянное '
+            'число запросов к базе данных (валидаторы ETag, подсчёт, '
+            'выборка произведений с категориями и выборка жанров). '
+            f'Для {size} произведений выполнено запросов: '
+            f'{len(context.captured_queries)}.'
+        )
+
+    def test_02_title_detail_queries(self, client):
+        create_catalog(10)
+        title = Title.objects.first()
+        url = f'/api/v1/titles/{title.id}/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()['genre']) == 3
+        assert len(context.captured_queries) == 3, (
+            f'Проверьте, что GET-запрос к `{url}` после валидаторов ETag '
+            'получает произведение с категорией одним запросом и жанры '
+            'вторым.'
+        )
+
+    def test_03_nested_parents(self, client, admin_client, user,
+                               user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        response = client.get(url)
+        assert response.status_code == 404, (
+            f'Проверьте, что GET-запрос к `{url}` для отзыва другого '
+            'произведения возвращает ответ со статусом 404.'
+        )
+
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'comment'})
+        assert response.status_code == 201
+        review_queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_queries) == 1, (
+            f'Проверьте, что POST-запрос к `{url}` загружает отзыв и '
+            'произведение одним запросом.'
+        )
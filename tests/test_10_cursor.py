@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import Comment
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPaginationAPI:
+
+    def walk(self, client, url, key):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Постраничный вывод по курсору не должен считать '
+                'количество записей.'
+            )
+            ids.extend(item['id'] for item in data['results'])
+            url = data[key]
+        return ids, data
+
+    def test_01_comments_cursor(self, client, admin_client, admin, user,
+                                user_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        pub_date = timezone.now()
+        Comment.objects.bulk_create(
+            Comment(review_id=reviews[0]['id'], author=admin, text=str(idx))
+            for idx in range(25)
+        )
+        # Одинаковая дата проверяет разрешение равенства по `id`.
+        Comment.objects.update(pub_date=pub_date)
+        expected = list(
+            Comment.objects.order_by('id').values_list('id', flat=True))
+
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        ids, last_page = self.walk(client, f'{url}?cursor=', 'next')
+        assert ids == expected, (
+            f'Проверьте, что переход по ссылкам `next` при `?cursor=` для '
+            f'`{url}` возвращает каждую запись ровно один раз по порядку.'
+        )
+
+        back_url = last_page['previous']
+        previous_ids, _ = self.walk(client, back_url, 'previous')
+        assert previous_ids == expected[10:20] + expected[:10], (
+            'Проверьте, что ссылки `previous` ведут на предыдущие страницы.'
+        )
+
+    def test_02_invalid_cursor(self, client, admin_client, user,
+                               user_client):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=broken'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f'Проверьте, что GET-запрос к `{url}` с некорректным курсором '
+            'возвращает ответ со статусом 404.'
+        )
+
+    def test_03_page_number_is_default(self, client, admin_client, user,
+                                       user_client):
+        _, titles = create_reviews(admin_client, {user: user_client})
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+        assert response.json()['count'] == 1
+        response = client.get('/api/v1/titles/?cursor=')
+        assert [title['id'] for title in response.json()['results']] == [
+            title['id'] for title in titles]
@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+
+from api.cache import (VERSION_BUCKETS, bump_versions, get_cache,
+                       get_cache_stats, get_shared_cache, get_versions,
+                       version_key)
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCacheAPI:
+
+    def test_01_categories_cache(self, client, admin_client):
+        url = '/api/v1/categories/'
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из кэша.'
+        )
+        assert get_cache_stats() == {'hits': 1, 'misses': 1}
+
+        response = admin_client.post(url, data={'name': 'Фильм',
+                                                'slug': 'films'})
+        assert response.status_code == HTTPStatus.CREATED
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 1, (
+            f'Проверьте, что создание категории сбрасывает кэш `{url}`.'
+        )
+        response = client.get(f'{url}?page=1')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что параметры запроса входят в ключ кэша.'
+        )
+
+    def test_02_title_cache_invalidation(self, client, admin_client,
+                                         user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        client.get(url)
+        client.get(other_url)
+        client.get('/api/v1/titles/')
+
+        create_single_review(user_client, titles[0]['id'], 'text', 7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 7, (
+            f'Проверьте, что новый отзыв сбрасывает кэш `{url}`.'
+        )
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Отзыв к одному произведению не должен сбрасывать кэш другого.'
+        )
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+
+        response = admin_client.patch(
+            url, data={'genre': [titles[1]['genre'][0]]})
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            titles[1]['genre'][0]], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш.'
+        )
+
+    def test_03_versions_shared_between_processes(self, client):
+        url = '/api/v1/categories/'
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        assert get_cache().get('stats:hits') is None, (
+            'Проверьте, что попадание в кэш не записывается в кэш сразу.'
+        )
+        # Отдельный экземпляр бэкенда — как кэш другого процесса.
+        other = caches.create_connection('shared')
+        version = other.get('version:categories')
+        assert version is not None
+        other.set('version:categories', version + 1, None)
+        assert client.get(url)['X-Cache'] == 'MISS', (
+            'Проверьте, что версии кэша хранятся в общем для процессов кэше.'
+        )
+
+    def test_04_shared_writes_do_not_list_directory(self, monkeypatch):
+        cache = get_shared_cache()
+        cache.set_many({f'key:{index}': index for index in range(50)}, None)
+
+        def list_cache_files():
+            raise AssertionError(
+                'Запись в общий кэш не должна перечислять каталог кэша.')
+
+        monkeypatch.setattr(cache, '_list_cache_files', list_cache_files)
+        assert cache.add('key:new', 1, None)
+        bump_versions('titles:list', 'titles:5', 'titles:5:name')
+        get_versions('reviews:7', 'comments:review:7')
+
+    def test_05_object_versions_bounded(self):
+        assert version_key('titles:5') == version_key(
+            f'titles:{5 + VERSION_BUCKETS}'), (
+            'Проверьте, что число ключей версий объектов ограничено.'
+        )
+        assert len({
+            version_key(name) for name in (
+                'titles', 'titles:list', 'titles:5', 'titles:5:name',
+                'titles:6', 'reviews:5', 'reviews:title:5')
+        }) == 7
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGetAPI:
+
+    def test_01_reviews_etag(self, client, admin_client, admin, user,
+                             user_client, moderator_client):
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        response = client.get(url)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+
+        detail_url = f'{url}{reviews[0]["id"]}/'
+        detail_etag = client.get(detail_url)['ETag']
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = user_client.patch(detail_url, data={'text': 'new'})
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов.'
+        )
+        etag = response['ETag']
+
+        create_single_review(moderator_client, titles[0]['id'], 'text', 3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+
+    def test_02_titles_not_modified_single_query(self, client,
+                                                 admin_client):
+        url = '/api/v1/titles/'
+        response = client.get(url)
+        headers = {
+            'HTTP_IF_MODIFIED_SINCE': response['Last-Modified'],
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, **headers)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с `If-Modified-Since` '
+            'без изменений возвращает ответ со статусом 304.'
+        )
+        assert len(context.captured_queries) == 1, (
+            f'Ответ 304 для `{url}` должен формироваться одним запросом к '
+            'базе данных.'
+        )
+
+        etag = client.get(url)['ETag']
+        create_reviews(admin_client, {})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+
+    def test_03_titles_etag_without_signals(self, client, admin_client):
+        create_reviews(admin_client, {})
+        url = '/api/v1/titles/'
+        etag = client.get(url)['ETag']
+        # Запись в обход сигналов, например из другого процесса без
+        # общего кэша версий, не сдвигает версии.
+        title = Title.objects.first()
+        Title.objects.bulk_create([Title(
+            name='Новое', year=2000, category_id=title.category_id)])
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что ETag списка произведений зависит от данных в '
+            'базе, а не только от версий кэша.'
+        )
+        assert response['ETag'] != etag
@@ -0,0 +1,112 @@
+import csv
+import gzip
+import os
+import shutil
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.management.commands.load_db import Command
+from reviews.models import Comment, Review, Title, User
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def count_rows(name):
+    with open(os.path.join(DATA_PATH, name), encoding='utf-8') as csv_file:
+        return sum(1 for _ in csv.DictReader(csv_file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13LoadDb:
+
+    def test_01_load_gzip(self, tmp_path):
+        for name in os.listdir(DATA_PATH):
+            with open(os.path.join(DATA_PATH, name), 'rb') as source:
+                with gzip.open(tmp_path / f'{name}.gz', 'wb') as target:
+                    shutil.copyfileobj(source, target)
+
+        call_command('load_db', path=str(tmp_path), batch_size=7)
+        assert User.objects.count() == count_rows('users.csv')
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv'), (
+            'Проверьте, что команда `load_db` загружает сжатые файлы '
+            'пачками.'
+        )
+        assert Title.objects.filter(rating__isnull=False).exists(), (
+            'Проверьте, что после загрузки пересчитываются рейтинги.'
+        )
+        assert not os.path.exists(tmp_path / '.load_db_state.json')
+
+    def test_02_resume(self, tmp_path):
+        for name in os.listdir(DATA_PATH):
+            shutil.copy(os.path.join(DATA_PATH, name), tmp_path)
+        comments = tmp_path / 'comments.csv'
+        original = comments.read_text(encoding='utf-8')
+        lines = original.splitlines(keepends=True)
+        # Повтор первой строки данных нарушает уникальность id.
+        comments.write_text(
+            ''.join(lines[:3] + lines[1:2] + lines[3:]), encoding='utf-8')
+
+        with pytest.raises(CommandError):
+            call_command('load_db', path=str(tmp_path), batch_size=2)
+        assert Comment.objects.count() == 2, (
+            'Проверьте, что при ошибке сохраняются уже записанные пачки.'
+        )
+        assert os.path.exists(tmp_path / '.load_db_state.json')
+
+        comments.write_text(original, encoding='utf-8')
+        call_command('load_db', path=str(tmp_path), batch_size=2,
+                     resume=True)
+        assert Comment.objects.count() == count_rows('comments.csv'), (
+            'Проверьте, что команда `load_db --resume` продолжает загрузку '
+            'с последней сохранённой пачки.'
+        )
+
+    def test_03_resume_after_commit(self, tmp_path, monkeypatch):
+        for name in os.listdir(DATA_PATH):
+            shutil.copy(os.path.join(DATA_PATH, name), tmp_path)
+        save_state = Command.save_state
+
+        def crash(self):
+            # Сбой после фиксации второй пачки, до записи прогресса.
+            if self.state.get('review.csv', {}).get('rows') == 4:
+                raise RuntimeError('сбой')
+            save_state(self)
+
+        monkeypatch.setattr(Command, 'save_state', crash)
+        with pytest.raises(RuntimeError):
+            call_command('load_db', path=str(tmp_path), batch_size=2)
+        assert Review.objects.count() == 4
+        monkeypatch.undo()
+
+        call_command('load_db', path=str(tmp_path), batch_size=2,
+                     resume=True)
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что `load_db --resume` не записывает повторно '
+            'пачку, зафиксированную до сохранения прогресса.'
+        )
+
+    def test_04_parallel(self, tmp_path):
+        for name in os.listdir(DATA_PATH):
+            shutil.copy(os.path.join(DATA_PATH, name), tmp_path)
+        call_command('load_db', path=str(tmp_path), workers=3)
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv'), (
+            'Проверьте, что команда `load_db --workers` загружает все файлы.'
+        )
+
+    def test_05_parallel_validation(self, tmp_path):
+        for name in os.listdir(DATA_PATH):
+            shutil.copy(os.path.join(DATA_PATH, name), tmp_path)
+        titles = tmp_path / 'titles.csv'
+        lines = titles.read_text(encoding='utf-8').splitlines(keepends=True)
+        titles.write_text(
+            ''.join(lines[:1] + ['999,Без года,год,1\n'] + lines[1:]),
+            encoding='utf-8')
+        with pytest.raises(CommandError, match='titles.csv, строка 2'):
+            call_command('load_db', path=str(tmp_path), workers=2)
+        assert not Title.objects.exists(), (
+            'Проверьте, что файл с ошибками проверки не записывается.'
+        )
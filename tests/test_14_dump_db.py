@@ -0,0 +1,59 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, Review, User
+from tests.conftest import MANAGE_PATH
+
+DATA_PATH = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def normalize(data):
+    # Файлы в static/data записаны с разными разделителями строк,
+    # без перевода строки в конце и не по порядку id, поэтому эталон —
+    # те же строки в записи csv-модуля после сортировки по id.
+    header, *rows = csv.reader(io.StringIO(data.decode(), newline=''))
+    output = io.StringIO(newline='')
+    writer = csv.writer(output)
+    writer.writerow(header)
+    writer.writerows(sorted(rows, key=lambda row: int(row[0])))
+    return output.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14DumpDb:
+
+    def test_01_round_trip(self, tmp_path):
+        call_command('load_db')
+        call_command('dump_db', path=str(tmp_path))
+        for name in os.listdir(DATA_PATH):
+            with open(os.path.join(DATA_PATH, name), 'rb') as source:
+                expected = normalize(source.read())
+            with open(tmp_path / name, 'rb') as dump:
+                assert dump.read().decode() == expected, (
+                    f'Проверьте, что `dump_db` записывает `{name}` в том '
+                    'же виде, что и файл в static/data.'
+                )
+
+        Comment.objects.all().delete()
+        Review.objects.all().delete()
+        User.objects.all().delete()
+        call_command('load_db', path=str(tmp_path), ignore_conflicts=True)
+        assert Comment.objects.count() == 3
+
+    def test_02_gzip_jsonl(self, tmp_path, admin):
+        call_command('dump_db', path=str(tmp_path), format='jsonl',
+                     gzip=True, chunk_size=1)
+        with gzip.open(tmp_path / 'users.jsonl.gz', 'rt',
+                       encoding='utf-8') as dump:
+            rows = [json.loads(line) for line in dump]
+        assert rows == [{
+            'id': str(admin.id), 'username': admin.username,
+            'email': admin.email, 'role': 'admin', 'bio': admin.bio,
+            'first_name': '', 'last_name': '',
+        }]
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ReviewBatchAPI:
+    url = '/api/v1/reviews/batch/'
+
+    def test_01_batch_not_auth(self, client):
+        response = client.post(
+            self.url, data='[]', content_type='application/json')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_02_batch_results(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, first, 'existing', 4)
+        data = [
+            {'title': second, 'text': 'new', 'score': 8},
+            {'title': first, 'text': 'duplicate', 'score': 5},
+            {'title': 100500, 'text': 'no title', 'score': 5},
+            {'title': second, 'text': 'twice in batch', 'score': 5},
+            {'title': second, 'text': 'bad score', 'score': 11},
+        ]
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        results = response.json()
+        assert [item['status'] for item in results] == [201, 400, 400, 400,
+                                                        400], (
+            f'Проверьте, что `{self.url}` возвращает результат для каждого '
+            'отзыва в пакете.'
+        )
+        review = Review.objects.get(pk=results[0]['id'])
+        assert (review.title_id, review.text) == (second, 'new')
+        assert Title.objects.get(pk=second).rating == 8, (
+            'Проверьте, что пакетная загрузка обновляет рейтинг.'
+        )
+        response = user_client.get(f'/api/v1/titles/{second}/')
+        assert response.json()['rating'] == 8
+
+    def test_03_batch_queries(self, admin_client, user_client):
+        create_titles(admin_client)
+        for _ in range(20):
+            admin_client.post('/api/v1/titles/', data={
+                'name': 'Произведение', 'year': 2000,
+                'genre': ['drama'], 'category': 'films'})
+        data = [
+            {'title': pk, 'text': 'text', 'score': 7}
+            for pk in Title.objects.values_list('pk', flat=True)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        assert Review.objects.count() == len(data)
+        assert len(context.captured_queries) <= 12, (
+            f'Проверьте, что `{self.url}` выполняет постоянное число '
+            'запросов независимо от размера пакета.'
+        )
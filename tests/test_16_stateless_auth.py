@@ -0,0 +1,103 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import RoleAccessToken, token_version_key
+
+
+def role_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}')
+    return client
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16StatelessAuthAPI:
+
+    def test_01_token_claims(self, admin):
+        token = RoleAccessToken.for_user(admin)
+        assert token['role'] == 'admin', (
+            'Проверьте, что токен содержит роль пользователя.'
+        )
+        assert token['ver'] == admin.token_version
+
+    def test_02_no_user_query(self, admin):
+        client = role_client(admin)
+        url = '/api/v1/genres/'
+        data = {'name': 'Ужасы', 'slug': 'horror'}
+        assert client.post(url, data=data).status_code == 201
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data={'name': 'Драма',
+                                              'slug': 'drama'})
+        assert response.status_code == 201
+        assert not user_queries(context), (
+            'Проверьте, что пользователь с токеном, содержащим роль, '
+            'не загружается из базы данных при каждом запросе.'
+        )
+
+    def test_03_me_loads_user(self, user):
+        response = role_client(user).get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert response.json()['email'] == user.email
+
+    def test_04_role_change_revokes_token(self, admin, admin_client, user):
+        client = role_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'})
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что после изменения роли выданные пользователю '
+            'токены перестают приниматься.'
+        )
+        user.refresh_from_db()
+        client = role_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+
+    def test_05_rename_revokes_token(self, admin_client, user):
+        client = role_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'})
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что после изменения имени пользователя токены со '
+            'старым именем перестают приниматься.'
+        )
+        user.refresh_from_db()
+        response = role_client(user).get('/api/v1/users/me/')
+        assert response.json()['username'] == 'renamed'
+
+    def test_06_revoke_and_delete(self, user):
+        client = role_client(user)
+        user.revoke_tokens()
+        assert client.get('/api/v1/users/me/').status_code == 401
+        client = role_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_07_revocation_shared_between_processes(self, user):
+        client = role_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        # Отдельный экземпляр бэкенда — как кэш другого процесса.
+        other = caches.create_connection('shared')
+        key = token_version_key(user.pk)
+        assert other.get(key) == user.token_version, (
+            'Проверьте, что версии токенов хранятся в общем для процессов '
+            'кэше.'
+        )
+        user.revoke_tokens()
+        assert other.get(key) is None, (
+            'Проверьте, что отзыв токенов виден другим процессам.'
+        )
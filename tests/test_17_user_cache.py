@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import user_cache
+from api.lru import LRUCache
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+class Test17LRUCache:
+
+    def test_01_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2, ttl=60)
+        cache.set(1, 'a')
+        cache.set(2, 'b')
+        assert cache.get(1) == 'a'
+        cache.set(3, 'c')
+        assert cache.get(2) is None, (
+            'Проверьте, что при переполнении вытесняется запись, к которой '
+            'дольше всего не обращались.'
+        )
+        assert cache.get(1) == 'a'
+        assert cache.get(3) == 'c'
+        assert cache.stats() == {
+            'hits': 3, 'misses': 1, 'hit_rate': 0.75, 'size': 2}
+
+    def test_02_expires(self):
+        cache = LRUCache(max_size=2, ttl=-1)
+        cache.set(1, 'a')
+        assert cache.get(1) is None
+        assert cache.stats()['size'] == 0
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17UserCacheAPI:
+
+    def test_01_user_cached(self, user_client):
+        url = '/api/v1/titles/'
+        assert user_client.get(url).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.get(url).status_code == 200
+        assert not user_queries(context), (
+            'Проверьте, что пользователь при аутентификации берётся из кэша.'
+        )
+        assert user_cache.stats()['hits'] == 1
+
+    def test_02_role_change_evicts(self, admin_client, user, user_client):
+        url = '/api/v1/genres/'
+        data = {'name': 'Ужасы', 'slug': 'horror'}
+        assert user_client.post(url, data=data).status_code == 403
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert response.status_code == 200
+        assert user_client.post(url, data=data).status_code == 201, (
+            'Проверьте, что пользователь удаляется из кэша при изменении '
+            'роли.'
+        )
+
+    def test_03_me_patch_evicts(self, user_client):
+        url = '/api/v1/users/me/'
+        assert user_client.get(url).json()['bio'] == 'user bio'
+        response = user_client.patch(url, data={'bio': 'new bio'})
+        assert response.status_code == 200
+        assert user_client.get(url).json()['bio'] == 'new bio'
+
+    def test_04_delete_evicts(self, admin_client, user, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert user_client.get('/api/v1/users/me/').status_code == 401
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.models import OutboxEmail, OutboxStatus
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise SMTPException('Сервер недоступен')
+
+
+@pytest.fixture
+def outbox_enabled(settings):
+    settings.EMAIL_OUTBOX_ENABLED = True
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+    data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+
+    def test_01_signup_queues_email(self, client, outbox_enabled):
+        response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что при включённой очереди писем регистрация не '
+            'отправляет письмо сама.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipient == self.data['email']
+        assert email.status == OutboxStatus.PENDING
+
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [self.data['email']]
+        email.refresh_from_db()
+        assert email.status == OutboxStatus.SENT
+        assert email.sent_at is not None
+
+    def test_02_batches(self, client, outbox_enabled):
+        for idx in range(5):
+            client.post(self.url_signup, data={
+                'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'})
+        call_command('send_emails', '--once', '--batch-size', '2')
+        assert len(mail.outbox) == 5
+        assert not OutboxEmail.objects.exclude(
+            status=OutboxStatus.SENT).exists()
+
+    def test_03_retry_with_backoff(self, client, outbox_enabled, settings):
+        client.post(self.url_signup, data=self.data)
+        settings.EMAIL_BACKEND = 'tests.test_18_email_outbox.FailingBackend'
+        started = timezone.now()
+        call_command('send_emails', '--once', '--backoff', '60',
+                     '--max-attempts', '2')
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxStatus.PENDING
+        assert email.attempts == 1
+        assert 'SMTPException' in email.last_error
+        assert email.next_attempt_at >= started + timedelta(seconds=60), (
+            'Проверьте, что неотправленное письмо откладывается на время '
+            'задержки.'
+        )
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_emails', '--once', '--max-attempts', '2')
+        email.refresh_from_db()
+        assert email.status == OutboxStatus.FAILED
+        assert email.attempts == 2
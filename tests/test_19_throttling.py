@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import get_throttle_stats
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'auth_ip': '100/min',
+            'auth_username': '2/min',
+            'auth_email': '3/min',
+        },
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ThrottlingAPI:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    def test_01_username_bucket(self, client, rates):
+        data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+        for _ in range(2):
+            assert client.post(self.url_signup, data=data).status_code == 200
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=data)
+        assert response.status_code == 429, (
+            'Проверьте, что повторные запросы к регистрации с тем же '
+            '`username` ограничиваются.'
+        )
+        assert not context.captured_queries, (
+            'Проверьте, что отклонённый запрос не обращается к базе данных.'
+        )
+        retry_after = int(response['Retry-After'])
+        assert 0 < retry_after <= 30, (
+            'Проверьте, что `Retry-After` равен времени до пополнения '
+            'корзины на один запрос.'
+        )
+        stats = get_throttle_stats('auth_username')['auth_username']
+        assert stats == {'allowed': 2, 'rejected': 1}
+
+    def test_02_email_bucket(self, client, rates):
+        for idx in range(3):
+            client.post(self.url_signup, data={
+                'email': 'Same@yamdb.fake', 'username': f'user{idx}'})
+        response = client.post(self.url_signup, data={
+            'email': 'same@yamdb.fake', 'username': 'other'})
+        assert response.status_code == 429
+
+    def test_03_ip_bucket(self, client, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                'auth_ip': '2/hour',
+                'auth_username': '100/min',
+                'auth_email': '100/min',
+            },
+        }
+        data = {'username': 'unexisting', 'confirmation_code': '1'}
+        for _ in range(2):
+            assert client.post(self.url_token, data=data).status_code == 404
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 429
+        assert 1790 <= int(response['Retry-After']) <= 1800
+        other = client.post(
+            self.url_token, data=data, REMOTE_ADDR='10.0.0.2')
+        assert other.status_code == 404, (
+            'Проверьте, что лимит по IP считается отдельно для каждого адреса.'
+        )
@@ -0,0 +1,88 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.views import RegisterUserView
+
+
+def user_selects(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and 'FROM "reviews_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SignupQueries:
+    url_signup = '/api/v1/auth/signup/'
+    data = {'email': 'valid@yamdb.fake', 'username': 'valid_username'}
+
+    def test_01_new_user(self, client, django_user_model):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == 200
+        assert len(user_selects(context)) == 1, (
+            'Проверьте, что при регистрации поиск конфликтов выполняется '
+            'одним запросом.'
+        )
+        assert django_user_model.objects.filter(**self.data).exists()
+
+    def test_02_existing_user(self, client):
+        client.post(self.url_signup, data=self.data)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == 200
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что повторная регистрация с теми же данными '
+            'выполняет один запрос.'
+        )
+
+    @pytest.mark.parametrize('data,fields', (
+        ({'email': 'valid@yamdb.fake', 'username': 'other'}, {'email'}),
+        ({'email': 'other@yamdb.fake', 'username': 'valid_username'},
+         {'username'}),
+    ))
+    def test_03_conflicts(self, client, data, fields):
+        client.post(self.url_signup, data=self.data)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_signup, data=data)
+        assert response.status_code == 400
+        assert set(response.json()) == fields, (
+            'Проверьте, что в ответе указаны занятые поля.'
+        )
+        assert len(context.captured_queries) == 1
+
+    def test_04_both_fields_taken_by_others(self, client):
+        client.post(self.url_signup, data=self.data)
+        client.post(self.url_signup, data={
+            'email': 'second@yamdb.fake', 'username': 'second'})
+        response = client.post(self.url_signup, data={
+            'email': 'second@yamdb.fake', 'username': 'valid_username'})
+        assert response.status_code == 400
+        assert set(response.json()) == {'username', 'email'}
+
+    def test_05_concurrent_signup(self, client, django_user_model):
+        # Пользователь создан другим запросом между поиском и вставкой.
+        django_user_model.objects.create(**self.data)
+        find_user = RegisterUserView.find_user
+        calls = iter([lambda *args: (None, {}), find_user])
+        with mock.patch.object(
+                RegisterUserView, 'find_user',
+                lambda self, *args: next(calls)(self, *args)):
+            response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == 200, (
+            'Проверьте, что одновременная регистрация с теми же данными '
+            'не приводит к ошибке.'
+        )
+
+        calls = iter([lambda *args: (None, {}), find_user])
+        with mock.patch.object(
+                RegisterUserView, 'find_user',
+                lambda self, *args: next(calls)(self, *args)):
+            response = client.post(self.url_signup, data={
+                'email': 'valid@yamdb.fake', 'username': 'other'})
+        assert response.status_code == 400
+        assert set(response.json()) == {'email'}
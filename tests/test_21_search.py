@@ -0,0 +1,109 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import search
+from reviews.models import Category, Comment, Review, Title
+
+
+@pytest.fixture(autouse=True)
+def clear_search_index(db):
+    # Между тестами таблицы очищаются без сигналов, индекс тоже.
+    with connection.cursor() as cursor:
+        search.get_backend(connection).clear(cursor)
+
+
+@pytest.fixture
+def catalog(user):
+    category = Category.objects.create(name='Фильм', slug='films')
+    dragon = Title.objects.create(
+        name='Драконье логово', year=2000, category=category,
+        description='Сказка о рыцарях')
+    river = Title.objects.create(
+        name='Тихая река', year=2001, category=category,
+        description='Фильм о драконах и реке')
+    review = Review.objects.create(
+        title=river, author=user, score=7, text='Лучший фильм про рыцарей')
+    comment = Comment.objects.create(
+        review=review, author=user, text='Согласен, рыцари отличные')
+    return dragon, river, review, comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21SearchAPI:
+    url = '/api/v1/search/'
+
+    def test_01_search(self, client, catalog):
+        dragon, river, review, comment = catalog
+        response = client.get(self.url, {'q': 'рыцарей'})
+        assert response.status_code == 200
+        data = response.json()
+        assert data['count'] == 1
+        assert data['results'][0] == {
+            'type': 'review', 'id': review.id, 'title': river.id,
+            'review': None, 'name': None, 'text': review.text,
+        }
+
+        response = client.get(self.url, {'q': 'рыцар'})
+        assert response.json()['count'] == 3, (
+            'Проверьте, что последнее слово запроса ищется по префиксу.'
+        )
+        response = client.get(self.url, {'q': 'рыцар', 'type': 'comment'})
+        results = response.json()['results']
+        assert results == [{
+            'type': 'comment', 'id': comment.id, 'title': river.id,
+            'review': review.id, 'name': None, 'text': comment.text,
+        }]
+
+    def test_02_ranking(self, client, catalog):
+        dragon, river, review, comment = catalog
+        results = client.get(self.url, {'q': 'дракон'}).json()['results']
+        assert [item['id'] for item in results] == [dragon.id, river.id], (
+            'Проверьте, что совпадение в названии ранжируется выше '
+            'совпадения в описании.'
+        )
+
+    def test_03_signals(self, client, catalog):
+        dragon, river, review, comment = catalog
+        review.text = 'Скучно'
+        review.save()
+        assert client.get(self.url, {'q': 'скучно'}).json()['count'] == 1
+        river.delete()
+        response = client.get(self.url, {'q': 'рыцар'})
+        assert [item['id'] for item in response.json()['results']] == [
+            dragon.id], (
+            'Проверьте, что при удалении произведения из индекса удаляются '
+            'и его отзывы с комментариями.'
+        )
+
+    def test_04_pagination(self, client, catalog):
+        category = Category.objects.first()
+        for idx in range(25):
+            Title.objects.create(
+                name=f'Комедия {idx}', year=2000, category=category)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, {'q': 'комедия', 'page': 3})
+        data = response.json()
+        assert data['count'] == 25
+        assert len(data['results']) == 5
+        assert data['next'] is None
+        assert len(context.captured_queries) == 2, (
+            'Проверьте, что страница поиска получается запросом числа '
+            'результатов и запросом самой страницы.'
+        )
+
+    def test_05_invalid(self, client):
+        assert client.get(self.url).status_code == 400
+        assert client.get(self.url, {'q': 'x', 'type': 'user'}).status_code \
+            == 400
+        response = client.get(self.url, {'q': '"* OR'})
+        assert response.status_code == 200
+        assert response.json()['count'] == 0
+
+    def test_06_rebuild(self, client, catalog):
+        with connection.cursor() as cursor:
+            search.get_backend(connection).clear(cursor)
+        assert client.get(self.url, {'q': 'рыцар'}).json()['count'] == 0
+        call_command('rebuild_search_index')
+        assert client.get(self.url, {'q': 'рыцар'}).json()['count'] == 3
@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.filters import TitleFilter
+from reviews.models import Category, Genre, Title
+
+
+@pytest.fixture
+def catalog():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    melodrama = Genre.objects.create(name='Мелодрама', slug='melodrama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = {}
+    for name, year, category, genres in (
+        ('Гамлет', 1600, books, (drama,)),
+        ('Гамбит', 2020, films, (drama, comedy)),
+        ('Титаник', 1997, films, (melodrama,)),
+        ('Маска', 1994, films, (comedy,)),
+    ):
+        titles[name] = Title.objects.create(
+            name=name, year=year, category=category)
+        titles[name].genre.set(genres)
+    return titles
+
+
+def names(response):
+    return sorted(item['name'] for item in response.json()['results'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleFilters:
+    url = '/api/v1/titles/'
+
+    def test_01_genre_exact(self, client, catalog):
+        response = client.get(self.url, {'genre': 'drama'})
+        assert names(response) == ['Гамбит', 'Гамлет'], (
+            'Проверьте, что фильтр `genre` сравнивает slug целиком.'
+        )
+
+    def test_02_genre_any_all(self, client, catalog):
+        response = client.get(self.url, {'genre': 'drama,comedy'})
+        assert names(response) == ['Гамбит', 'Гамлет', 'Маска']
+        assert response.json()['count'] == 3
+        response = client.get(
+            self.url, {'genre': 'drama,comedy', 'genre_match': 'all'})
+        assert names(response) == ['Гамбит']
+
+    def test_03_prefixes(self, client, catalog):
+        response = client.get(self.url, {'genre_prefix': 'melo'})
+        assert names(response) == ['Титаник']
+        response = client.get(self.url, {'category_prefix': 'bo'})
+        assert names(response) == ['Гамлет']
+        response = client.get(self.url, {'name_prefix': 'Гам'})
+        assert names(response) == ['Гамбит', 'Гамлет']
+        assert client.get(self.url, {'category': 'book'}).json()[
+            'count'] == 0
+
+    def test_04_year_range(self, client, catalog):
+        response = client.get(
+            self.url, {'year_min': 1990, 'year_max': 2000})
+        assert names(response) == ['Маска', 'Титаник']
+
+    def test_05_single_query(self, client, catalog):
+        params = {
+            'genre': 'drama,comedy', 'genre_match': 'all',
+            'category_prefix': 'fi', 'name_prefix': 'Гам',
+            'year_min': 2000,
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, params)
+        assert names(response) == ['Гамбит']
+        assert len(context.captured_queries) == 4, (
+            'Проверьте, что сочетание фильтров выполняется одним запросом '
+            'выборки (плюс валидаторы ETag, подсчёт и выборка жанров).'
+        )
+
+    @pytest.mark.skipif(connection.vendor != 'sqlite',
+                        reason='План запроса SQLite')
+    def test_06_prefix_uses_index(self, catalog):
+        queryset = TitleFilter(
+            {'name_prefix': 'Гам'}, queryset=Title.objects.all()).qs
+        plan = queryset.explain()
+        assert 'USING INDEX' in plan or 'USING COVERING INDEX' in plan, (
+            f'Проверьте, что поиск по началу названия использует индекс: '
+            f'{plan}'
+        )
@@ -0,0 +1,22 @@
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+
+from reviews.models import Category, Genre, GenreTitle, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Indexes:
+
+    def test_01_explain_queries(self):
+        # Команда завершается ошибкой, если запрос читает таблицу целиком.
+        call_command('explain_queries')
+
+    def test_02_unique_genre_title(self):
+        category = Category.objects.create(name='Фильм', slug='films')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        title = Title.objects.create(name='Гамлет', year=2000,
+                                     category=category)
+        GenreTitle.objects.create(title=title, genre=genre)
+        with pytest.raises(IntegrityError):
+            GenreTitle.objects.create(title=title, genre=genre)
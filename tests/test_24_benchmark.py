@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+from reviews.models import Comment, Review, Title, User
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Benchmark:
+
+    def test_01_generate_dataset(self):
+        call_command('generate_dataset', users=3, categories=2, genres=3,
+                     titles=4, reviews=10, comments=5, stdout=None)
+        assert User.objects.count() == 3
+        assert Title.objects.count() == 4
+        assert Review.objects.count() == 10
+        assert Comment.objects.count() == 5
+        assert Title.objects.filter(rating__isnull=False).count() == 4
+
+    def test_02_generate_dataset_limits(self):
+        with pytest.raises(CommandError):
+            call_command('generate_dataset', users=1, categories=1,
+                         genres=1, titles=1, reviews=2, comments=0)
+
+    def test_03_benchmark_api(self, tmp_path):
+        # Тестовая база pytest находится в памяти, поэтому команда
+        # запускается отдельным процессом со своей тестовой базой.
+        output = tmp_path / 'benchmark.json'
+        database = os.path.join(settings.BASE_DIR, 'db.sqlite3')
+        with open(database, 'rb') as file:
+            before = file.read()
+        subprocess.run(
+            [sys.executable, 'manage.py', 'benchmark_api', '--users', '3',
+             '--categories', '2', '--genres', '3', '--titles', '6',
+             '--reviews', '6', '--comments', '6', '--requests', '2',
+             '--warmup', '1', '--output', str(output)],
+            cwd=settings.BASE_DIR, check=True, capture_output=True)
+        report = json.loads(output.read_text())
+        assert report['meta']['transports'] == ['client', 'wsgi']
+        assert report['dataset']['rows']['title'] == 6
+        endpoints = {result['endpoint'] for result in report['results']}
+        assert {'titles', 'reviews', 'comments', 'signup',
+                'reviews:batch'} <= endpoints
+        for result in report['results']:
+            assert result['requests'] == 2
+            assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+            assert all(int(status) < 400 for status in result['status_codes'])
+        with open(database, 'rb') as file:
+            assert file.read() == before
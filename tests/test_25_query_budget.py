@@ -0,0 +1,99 @@
+import logging
+
+import pytest
+from rest_framework.viewsets import ViewSetMixin
+
+from api.budget import QueryBudgetExceeded, get_query_budget
+from api.urls import router
+from api.views import TitleViewSet
+from reviews.management.commands.generate_dataset import generate
+from reviews.models import Comment, Review
+
+PAGE_SIZES = (1, 10, 50)
+
+
+@pytest.fixture
+def dataset():
+    # 60 отзывов к каждому из двух произведений и 120 комментариев
+    # к одному отзыву, у всех свои авторы; плюс 60 произведений.
+    generate(users=60, categories=3, genres=5, titles=2, reviews=120,
+             comments=120)
+    generate(users=0, categories=1, genres=0, titles=60, reviews=0,
+             comments=0)
+    review = Review.objects.first()
+    Comment.objects.update(review=review)
+    return review
+
+
+def list_urls(review):
+    reviews = f'/api/v1/titles/{review.title_id}/reviews/'
+    return (
+        '/api/v1/titles/',
+        '/api/v1/titles/?cursor=',
+        '/api/v1/titles/?genre=genre-1,genre-2&genre_match=all',
+        reviews,
+        f'{reviews}?cursor=',
+        f'{reviews}{review.id}/comments/',
+        f'{reviews}{review.id}/comments/?cursor=',
+        '/api/v1/genres/',
+        '/api/v1/categories/',
+        '/api/v1/users/',
+        '/api/v1/search/?q=дракон',
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25QueryBudget:
+
+    def test_01_every_list_has_budget(self):
+        for _, viewset, _ in router.registry:
+            assert get_query_budget(viewset, 'list', 'GET') is not None, (
+                f'Задайте query_budget для списка {viewset.__name__}.')
+
+    def test_02_lists_within_budget(self, admin_client, dataset):
+        # Бюджет проверяет middleware (QUERY_BUDGET_MODE = 'raise'), а
+        # число запросов не должно зависеть от размера страницы.
+        # Первый запрос кэширует версию токена администратора.
+        admin_client.get('/api/v1/users/me/')
+        for url in list_urls(dataset):
+            counts = set()
+            for size in PAGE_SIZES:
+                separator = '&' if '?' in url else '?'
+                response = admin_client.get(
+                    f'{url}{separator}page_size={size}')
+                assert response.status_code == 200, url
+                counts.add(int(response['X-Query-Count']))
+            assert len(counts) == 1, (
+                f'Проверьте, что число SQL-запросов GET-запроса к `{url}` '
+                f'не зависит от размера страницы: {sorted(counts)}.'
+            )
+
+    def test_03_budget_exceeded(self, client, dataset, monkeypatch):
+        monkeypatch.setattr(TitleViewSet, 'query_budget', {'list': 1})
+        with pytest.raises(QueryBudgetExceeded):
+            client.get('/api/v1/titles/')
+
+    def test_04_budget_logged(self, client, dataset, monkeypatch, settings,
+                              caplog):
+        settings.QUERY_BUDGET_MODE = 'log'
+        monkeypatch.setattr(TitleViewSet, 'query_budget', {'list': 1})
+        with caplog.at_level(logging.WARNING, logger='api.budget'):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'GET /api/v1/titles/' in caplog.text
+
+    def test_05_budget_off(self, client, dataset, settings):
+        settings.QUERY_BUDGET_MODE = 'off'
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'X-Query-Count' not in response
+
+    def test_06_get_query_budget(self):
+        class View(ViewSetMixin):
+            query_budget = {'list': 3, 'post': 5}
+
+        assert get_query_budget(View, 'list', 'GET') == 3
+        assert get_query_budget(View, None, 'POST') == 5
+        assert get_query_budget(View, 'retrieve', 'GET') is None
+        View.query_budget = 2
+        assert get_query_budget(View, 'destroy', 'DELETE') == 2
@@ -0,0 +1,89 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.db import OperationalError, connection
+
+from api_yamdb.sqlite3.base import DatabaseWrapper
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture
+def file_database(tmp_path):
+    def open_connection(alias, **options):
+        settings_dict = {
+            **connection.settings_dict,
+            'NAME': str(tmp_path / 'db.sqlite3'),
+            'PRAGMAS': {
+                **connection.settings_dict['PRAGMAS'], 'busy_timeout': 50},
+            **options,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias)
+        opened.append(wrapper)
+        return wrapper
+
+    opened = []
+    yield open_connection
+    for wrapper in opened:
+        wrapper.close()
+
+
+@pytest.mark.django_db
+class Test26SQLite:
+
+    def test_01_pragmas(self):
+        assert pragma(connection, 'synchronous') == 1
+        assert pragma(connection, 'busy_timeout') == 5000
+        assert pragma(connection, 'cache_size') == -64000
+        assert pragma(connection, 'foreign_keys') == 1
+
+    def test_02_wal(self, file_database):
+        assert pragma(file_database('first'), 'journal_mode') == 'wal'
+
+    def test_03_immediate_transaction(self, file_database):
+        writer = file_database('writer')
+        immediate = file_database('immediate')
+        deferred = file_database('deferred', TRANSACTION_MODE=None)
+        with writer.cursor() as cursor:
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                # IMMEDIATE ждёт блокировку записи уже на BEGIN, DEFERRED
+                # откладывает её до первой записи.
+                with pytest.raises(OperationalError, match='locked'):
+                    immediate._start_transaction_under_autocommit()
+                deferred._start_transaction_under_autocommit()
+                deferred.cursor().execute('ROLLBACK')
+            finally:
+                cursor.execute('ROLLBACK')
+
+
+def test_benchmark_sqlite(tmp_path):
+    # Процессам замера нужна база в файле, поэтому отдельный процесс.
+    output = tmp_path / 'sqlite.json'
+    subprocess.run(
+        [sys.executable, 'manage.py', 'benchmark_sqlite', '--readers', '1',
+         '--writers', '1', '--threads', '2', '--duration', '0.5',
+         '--titles', '5',
+         '--output', str(output)],
+        cwd=settings.BASE_DIR, check=True, capture_output=True)
+    results = json.loads(output.read_text())
+    assert [result['profile'] for result in results] == [
+        'production', 'default', 'write-queue']
+    assert results[0]['journal_mode'] == 'wal'
+    assert results[1]['journal_mode'] == 'delete'
+    writes = results[2]['writer']
+    assert 0 < writes['queue_batches'] <= writes['queue_operations']
+    for result in results:
+        for role in ('reader', 'writer'):
+            assert result[role]['requests'] > 0
+            assert result[role]['errors'] == 0
+    # С очередью пишущие команды выполняет поток-писатель.
+    for result in results[:2]:
+        assert result['writer']['write_statements'] is not None
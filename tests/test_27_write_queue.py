@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+from django.db import transaction
+
+from api.writer import GroupCommitWriter, WriteQueueError, write, writer
+from reviews.models import Category, Comment, Review, User
+from tests.utils import create_reviews
+
+
+@pytest.fixture
+def write_queue(settings):
+    settings.WRITE_QUEUE = {
+        'ENABLED': True, 'MAX_BATCH': 100, 'MAX_DELAY': 0.05, 'TIMEOUT': 5}
+
+
+def run_concurrently(*funcs):
+    results = [None] * len(funcs)
+    barrier = threading.Barrier(len(funcs))
+
+    def run(index, func):
+        barrier.wait()
+        try:
+            results[index] = write(func)
+        except Exception as error:
+            results[index] = error
+
+    threads = [
+        threading.Thread(target=run, args=(index, func))
+        for index, func in enumerate(funcs)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27WriteQueue:
+
+    def test_01_views_write_through_queue(self, write_queue, client,
+                                          admin_client, user, user_client):
+        operations = writer.operations
+        reviews, titles = create_reviews(admin_client, {user: user_client})
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        response = user_client.post(url, data={'text': 'Комментарий'})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'queued', 'email': 'queued@yamdb.fake'})
+        assert response.status_code == 200
+        assert User.objects.filter(username='queued').exists()
+        assert Comment.objects.count() == 1
+        assert writer.operations - operations == Review.objects.count() + 2
+
+    def test_02_group_commit(self, write_queue):
+        batches = writer.batches
+        results = run_concurrently(*(
+            lambda index=index: Category.objects.create(
+                name=f'Категория {index}', slug=f'category-{index}')
+            for index in range(8)
+        ))
+        assert Category.objects.count() == 8
+        assert [category.slug for category in results] == [
+            f'category-{index}' for index in range(8)]
+        assert writer.batches - batches < 8
+
+    def test_03_failed_operation_isolated(self, write_queue):
+        def fail():
+            Category.objects.create(name='Откат', slug='rollback')
+            raise ValueError('ошибка')
+
+        results = run_concurrently(
+            fail,
+            lambda: Category.objects.create(name='Фильм', slug='films'))
+        assert isinstance(results[0], ValueError)
+        assert list(Category.objects.values_list('slug', flat=True)) == [
+            'films']
+
+    def test_04_inline_in_transaction(self, write_queue):
+        with transaction.atomic():
+            thread = write(threading.current_thread)
+        assert thread is threading.current_thread()
+
+    def test_05_base_exception_resolves_future(self, write_queue):
+        def interrupt():
+            Category.objects.create(name='Откат', slug='rollback')
+            raise SystemExit
+
+        with pytest.raises(WriteQueueError):
+            write(interrupt)
+        assert not Category.objects.exists()
+        category = write(
+            lambda: Category.objects.create(name='Фильм', slug='films'))
+        assert category.slug == 'films', (
+            'Проверьте, что поток-писатель продолжает работу после '
+            'прерванной операции.'
+        )
+
+    def test_06_timeout_cancels_operation(self, settings, write_queue):
+        settings.WRITE_QUEUE = {**settings.WRITE_QUEUE, 'TIMEOUT': 0.2}
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        blocker = threading.Thread(target=write, args=(block,))
+        blocker.start()
+        started.wait()
+        try:
+            with pytest.raises(WriteQueueError):
+                write(lambda: Category.objects.create(
+                    name='Фильм', slug='films'))
+        finally:
+            release.set()
+            blocker.join()
+        assert write(Category.objects.count) == 0, (
+            'Проверьте, что операция, не дождавшаяся очереди, отменяется.'
+        )
+
+    def test_07_restart_keeps_queue(self, write_queue):
+        fresh = GroupCommitWriter()
+        queued = Future()
+        fresh.queue.put((queued, Category.objects.create, (),
+                         {'name': 'Фильм', 'slug': 'films'}))
+        assert fresh.submit(Category.objects.count) == 1, (
+            'Проверьте, что запуск потока-писателя не теряет операции, '
+            'уже поставленные в очередь.'
+        )
+        assert queued.result(5).slug == 'films'
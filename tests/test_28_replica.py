@@ -0,0 +1,139 @@
+import sqlite3
+
+import pytest
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connection, connections
+
+from api import replica
+from api.replica import ReplicaRouter, sync_sqlite_replica
+from api.views import TitleViewSet
+from reviews.models import Category, Title
+
+
+@pytest.fixture
+def replica_alias(settings):
+    # Маршрутизатор отправляет чтение в REPLICA_DATABASE_ALIAS; в тестах
+    # реплика — та же база, а отмечается только, куда шло чтение.
+    settings.REPLICA_DATABASE_ALIAS = 'default'
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    recorded = []
+    db_for_read = ReplicaRouter.db_for_read
+
+    def record(self, model, **hints):
+        recorded.append(replica.reading_from_replica())
+        return db_for_read(self, model, **hints)
+
+    monkeypatch.setattr(ReplicaRouter, 'db_for_read', record)
+    return recorded
+
+
+@pytest.fixture
+def file_replica(tmp_path):
+    connections.databases['file_replica'] = {
+        **connection.settings_dict, 'NAME': str(tmp_path / 'replica.sqlite3'),
+        'TEST': {}}
+    yield tmp_path / 'replica.sqlite3'
+    connections['file_replica'].close()
+    del connections.databases['file_replica']
+    del connections._connections.file_replica
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28Replica:
+
+    def test_01_router(self, settings):
+        router = ReplicaRouter()
+        settings.REPLICA_DATABASE_ALIAS = 'replica'
+        cache_model = DatabaseCache('api_cache', {}).cache_model_class
+        token = replica._replica_reads.set(True)
+        try:
+            assert router.db_for_read(Title) == 'replica'
+            assert router.db_for_write(Title, instance=Title()) == 'default'
+            assert router.db_for_read(cache_model) == 'default', (
+                'Проверьте, что кэш в базе данных не читается с реплики.'
+            )
+        finally:
+            replica._replica_reads.reset(token)
+        assert router.db_for_read(Title) == 'default'
+        assert router.allow_migrate('replica', 'reviews') is False
+        assert router.allow_migrate('default', 'reviews') is True
+
+    def test_02_no_replica(self, client, reads):
+        Category.objects.create(name='Фильм', slug='films')
+        assert client.get('/api/v1/categories/').status_code == 200
+        assert reads and not any(reads)
+
+    def test_03_read_actions_use_replica(self, replica_alias, reads,
+                                         admin_client):
+        response = admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        assert response.status_code == 201
+        assert not any(reads)
+        # Пользователь, изменивший данные, читает из основной базы.
+        reads.clear()
+        assert admin_client.get('/api/v1/categories/').status_code == 200
+        assert reads and not any(reads)
+
+    def test_04_other_users_read_replica(self, replica_alias, reads, client,
+                                         admin_client):
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        reads.clear()
+        response = client.get('/api/v1/categories/')
+        assert response.status_code == 200
+        assert reads and all(reads)
+        assert not replica.reading_from_replica()
+
+    def test_05_sticky_window(self, replica_alias, reads, admin_client,
+                              settings):
+        settings.REPLICA_STICKY_SECONDS = 0
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        reads.clear()
+        admin_client.get('/api/v1/categories/')
+        assert reads and all(reads)
+
+    def test_06_cache_version(self, replica_alias):
+        view = TitleViewSet()
+        view.action = 'list'
+        assert 'replica' not in view.get_cache_version_names()
+        token = replica._replica_reads.set(True)
+        try:
+            assert 'replica' in view.get_cache_version_names()
+        finally:
+            replica._replica_reads.reset(token)
+
+    def test_07_sync_sqlite_replica(self, file_replica):
+        Category.objects.create(name='Фильм', slug='films')
+        sync_sqlite_replica(replica='file_replica')
+        with sqlite3.connect(file_replica) as copy:
+            rows = copy.execute(
+                'SELECT slug FROM reviews_category').fetchall()
+        assert rows == [('films',)]
+
+    def test_08_replica_queries_counted(self, settings, file_replica,
+                                        client):
+        settings.QUERY_BUDGET_MODE = 'log'
+        Category.objects.create(name='Фильм', slug='films')
+        sync_sqlite_replica(replica='file_replica')
+        settings.REPLICA_DATABASE_ALIAS = 'file_replica'
+        response = client.get('/api/v1/categories/')
+        assert response.json()['count'] == 1
+        assert int(response['X-Query-Count']) > 0, (
+            'Проверьте, что бюджет считает и запросы к реплике.'
+        )
+
+    def test_09_sticky_shared_between_processes(self, replica_alias, admin,
+                                                admin_client):
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+        # Отдельный экземпляр бэкенда — как кэш другого процесса.
+        other = caches.create_connection('shared')
+        assert other.get(replica.sticky_key(admin.pk)) is not None, (
+            'Проверьте, что отметка чтения из основной базы хранится в '
+            'общем для процессов кэше.'
+        )
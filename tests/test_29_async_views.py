@@ -0,0 +1,138 @@
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import types
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.test import AsyncClient
+from django.urls import include, path
+
+from api.async_views import with_async_reads
+from api.urls import router
+from api.views import TitleViewSet
+from reviews.management.commands.generate_dataset import generate
+from reviews.models import Review
+
+
+@pytest.fixture
+def async_urls(settings):
+    urlconf = types.ModuleType('async_urls')
+    urlconf.urlpatterns = [
+        path('api/v1/', include(with_async_reads(router.urls))),
+    ]
+    settings.ROOT_URLCONF = urlconf
+    return urlconf
+
+
+@pytest.fixture
+def review():
+    generate(users=5, categories=2, genres=3, titles=3, reviews=6,
+             comments=6)
+    return Review.objects.filter(comment__isnull=False).first()
+
+
+def read_urls(review):
+    reviews = f'/api/v1/titles/{review.title_id}/reviews/'
+    return (
+        '/api/v1/titles/',
+        f'/api/v1/titles/{review.title_id}/',
+        reviews,
+        f'{reviews}{review.id}/comments/',
+    )
+
+
+def async_request(method, *args, **kwargs):
+    async def request():
+        return await getattr(AsyncClient(), method)(*args, **kwargs)
+
+    return async_to_sync(request)()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29AsyncViews:
+
+    def test_01_only_reads_are_async(self):
+        async_views = {
+            (pattern.callback.cls, pattern.callback.actions['get'])
+            for pattern in with_async_reads(router.urls)
+            if asyncio.iscoroutinefunction(getattr(
+                pattern, 'callback', None))
+        }
+        assert {
+            (view.__name__, action) for view, action in async_views
+        } == {
+            ('TitleViewSet', 'list'), ('TitleViewSet', 'retrieve'),
+            ('ReviewViewSet', 'list'), ('CommentViewSet', 'list'),
+        }
+        for pattern in with_async_reads(router.urls):
+            callback = getattr(pattern, 'callback', None)
+            if asyncio.iscoroutinefunction(callback):
+                assert callback.csrf_exempt
+
+    def test_02_same_responses(self, client, async_urls, review,
+                               token_user):
+        headers = {'authorization': f'Bearer {token_user["access"]}'}
+        for url in read_urls(review):
+            expected = client.get(url)
+            response = async_request('get', url, **headers)
+            assert response.status_code == 200, url
+            assert response.json() == expected.json(), url
+            # Запросы к базе считаются и в потоке пула.
+            assert 'X-Query-Count' in response, url
+
+    def test_03_write_through_async_route(self, async_urls, review,
+                                          token_user):
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        response = async_request(
+            'post', url, {'text': 'Отзыв', 'score': 8},
+            content_type='application/json',
+            authorization=f'Bearer {token_user["access"]}')
+        assert response.status_code == 201
+        assert Review.objects.filter(pk=response.json()['id']).exists()
+        response = async_request(
+            'post', url, {'text': 'Отзыв', 'score': 8},
+            content_type='application/json')
+        assert response.status_code == 401
+
+    def test_04_reads_run_in_parallel(self, async_urls, review,
+                                      monkeypatch):
+        # Оба запроса должны одновременно дойти до представления, иначе
+        # барьер не пропустит ни один из них.
+        barrier = threading.Barrier(2, timeout=10)
+        list_titles = TitleViewSet.list
+
+        def list_after_barrier(self, request, *args, **kwargs):
+            barrier.wait()
+            return list_titles(self, request, *args, **kwargs)
+
+        monkeypatch.setattr(TitleViewSet, 'list', list_after_barrier)
+
+        async def get_twice():
+            return await asyncio.gather(
+                AsyncClient().get('/api/v1/titles/'),
+                AsyncClient().get('/api/v1/titles/'))
+
+        responses = async_to_sync(get_twice)()
+        assert [response.status_code for response in responses] == [200, 200]
+
+
+def test_benchmark_asgi(tmp_path):
+    # Обработчикам в потоках нужна база в файле, поэтому отдельный процесс.
+    output = tmp_path / 'asgi.json'
+    subprocess.run(
+        [sys.executable, 'manage.py', 'benchmark_asgi', '--concurrency', '4',
+         '--requests', '20', '--warmup', '4', '--titles', '10',
+         '--output', str(output)],
+        cwd=settings.BASE_DIR, check=True, capture_output=True)
+    results = json.loads(output.read_text())
+    assert [result['server'] for result in results] == [
+        'wsgi', 'asgi-sync', 'asgi']
+    for result in results:
+        assert result['requests'] == 20
+        assert result['status_codes'] == {'200': 20}
+        assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
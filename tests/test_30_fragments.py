@@ -0,0 +1,167 @@
+import json
+import time
+from itertools import count
+
+import pytest
+
+from api.cache import get_shared_cache, version_key
+from api.renderers import FragmentJSONRenderer, Fragments
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from reviews.management.commands.generate_dataset import generate
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+SERIALIZERS = (TitleSerializer, ReviewSerializer, CommentSerializer)
+
+
+@pytest.fixture
+def serialized(monkeypatch):
+    """Число объектов, представленных каждым сериализатором."""
+    calls = {serializer: 0 for serializer in SERIALIZERS}
+    for serializer in SERIALIZERS:
+        def to_representation(self, instance, serializer=serializer,
+                              original=serializer.to_representation):
+            calls[serializer] += 1
+            return original(self, instance)
+
+        monkeypatch.setattr(serializer, 'to_representation',
+                            to_representation)
+    return calls
+
+
+@pytest.fixture
+def review():
+    generate(users=5, categories=2, genres=3, titles=4, reviews=8,
+             comments=8)
+    Title.objects.recompute_ratings()
+    review = Review.objects.filter(comment__isnull=False).first()
+    Comment.objects.update(review=review)
+    return review
+
+
+class Requests:
+    """GET-запросы с новым параметром: ответ не берётся из кэша ответов."""
+
+    def __init__(self, client):
+        self.client = client
+        self.counter = count()
+
+    def __call__(self, url):
+        response = self.client.get(f'{url}?n={next(self.counter)}')
+        assert response.status_code == 200, url
+        return response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30Fragments:
+
+    def test_01_renderer(self):
+        renderer = FragmentJSONRenderer()
+        fragments = Fragments([b'{"id":1}', '{"имя":"Ёж"}'.encode()])
+        data = {'count': 2, 'next': None, 'results': fragments}
+        expected = {'count': 2, 'next': None,
+                    'results': [{'id': 1}, {'имя': 'Ёж'}]}
+        assert json.loads(renderer.render(data)) == expected
+        assert json.loads(renderer.render(
+            data, 'application/json; indent=4',
+            {'indent': 4})) == expected
+        assert json.loads(renderer.render(fragments)) == expected['results']
+        assert renderer.render({'a': [1]}) == b'{"a":[1]}'
+
+    def test_02_second_request_not_serialized(self, client, review,
+                                              serialized):
+        get = Requests(client)
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{review.title_id}/reviews/',
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+            f'comments/',
+        )
+        first = [get(url) for url in urls]
+        assert all(serialized.values())
+        serialized.update(dict.fromkeys(serialized, 0))
+        assert [get(url) for url in urls] == first
+        assert not any(serialized.values()), (
+            'Проверьте, что неизменённые объекты не сериализуются повторно.'
+        )
+
+    def test_03_review_changes_title_rating(self, client, review,
+                                            serialized):
+        get = Requests(client)
+        get('/api/v1/titles/')
+        review.score = 1 if review.score != 1 else 2
+        review.save()
+        titles = {title['id']: title for title in get('/api/v1/titles/')[
+            'results']}
+        assert serialized[TitleSerializer] == Title.objects.count() + 1, (
+            'Проверьте, что повторно сериализуется только произведение '
+            'изменённого отзыва.'
+        )
+        expected = Title.objects.get(pk=review.title_id).rating
+        assert titles[review.title_id]['rating'] == expected
+
+    def test_04_genre_and_category_rename(self, client, review):
+        get = Requests(client)
+        get('/api/v1/titles/')
+        title = Title.objects.get(pk=review.title_id)
+        genre = title.genre.first()
+        genre.name = 'Новый жанр'
+        genre.save()
+        category = Category.objects.get(pk=title.category_id)
+        category.name = 'Новая категория'
+        category.save()
+        titles = {item['id']: item for item in get('/api/v1/titles/')[
+            'results']}
+        assert {'name': 'Новый жанр', 'slug': genre.slug} in titles[
+            title.pk]['genre']
+        assert titles[title.pk]['category']['name'] == 'Новая категория'
+        Genre.objects.filter(pk=genre.pk).delete()
+        titles = {item['id']: item for item in get('/api/v1/titles/')[
+            'results']}
+        assert genre.slug not in {
+            item['slug'] for item in titles[title.pk]['genre']}
+
+    def test_05_nested_lists(self, client, review, serialized):
+        get = Requests(client)
+        reviews_url = f'/api/v1/titles/{review.title_id}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+        get(reviews_url)
+        get(comments_url)
+        serialized.update(dict.fromkeys(serialized, 0))
+
+        title = Title.objects.get(pk=review.title_id)
+        title.name = 'Новое название'
+        title.save()
+        assert {item['title'] for item in get(reviews_url)['results']} == {
+            'Новое название'}
+
+        review.text = 'Новый текст отзыва'
+        review.save()
+        assert {item['review'] for item in get(comments_url)['results']} == {
+            'Новый текст отзыва'}
+
+        comment = Comment.objects.first()
+        serialized.update(dict.fromkeys(serialized, 0))
+        comment.text = 'Новый комментарий'
+        comment.save()
+        comments = {item['id']: item for item in get(comments_url)[
+            'results']}
+        assert comments[comment.pk]['text'] == 'Новый комментарий'
+        assert serialized[CommentSerializer] == 1
+
+        author = User.objects.get(pk=comment.author_id)
+        author.username = 'renamed'
+        author.save()
+        comments = {item['id']: item for item in get(comments_url)[
+            'results']}
+        assert comments[comment.pk]['author'] == 'renamed'
+
+    def test_06_changed_during_request(self, client, review, serialized):
+        # Версия новее начала запроса: данные могли быть прочитаны до
+        # изменения, поэтому фрагмент отдаётся, но не сохраняется.
+        get_shared_cache().set(version_key(f'titles:{review.title_id}'),
+                               time.time_ns() // 1000 + 10 ** 9, None)
+        get = Requests(client)
+        get('/api/v1/titles/')
+        get('/api/v1/titles/')
+        assert serialized[TitleSerializer] == Title.objects.count() + 1